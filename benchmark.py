@@ -0,0 +1,232 @@
+""" A benchmark harness for the sudoku engine. Runs the engine over the puzzle
+    corpora in the corpora directory, reporting latency percentiles,
+    throughput, peak memory, and search nodes for each corpus, along with the
+    cold-start import time of the engine, and compares two sets of results to
+    catch performance regressions.
+    Usage:
+        python3 benchmark.py run [--corpus NAME ...] [--output FILE] [--repeat N]
+        python3 benchmark.py compare BASELINE CURRENT [--threshold FRACTION]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from sudoku import Sudoku_engine
+from sudoku.batch import read_puzzles
+from sudoku.cli import add_engine_arguments, engine_options_from_args
+from sudoku.corpus import PACKED_EXTENSION, Packed_corpus
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpora')
+PERCENTILES = (50, 90, 99)
+REPEAT = 5 #timed passes over each corpus, whose median metrics are reported
+LOWER_IS_BETTER = ('mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'peak_memory_kb', 'mean_nodes', 'max_nodes', 'failures') #max_ms is one solve, too noisy to compare
+HIGHER_IS_BETTER = ('throughput',)
+MIN_CHANGE = {'mean_ms': 0.05, 'p50_ms': 0.05, 'p90_ms': 0.05, 'p99_ms': 0.05, 'import_ms': 1.0} #smaller changes are within timing noise
+IMPORT_MODULE = 'sudoku' #the headless engine, which should not pull in tkinter
+IMPORT_SCRIPT = ('import sys, time\n'
+                 'start = time.perf_counter()\n'
+                 'import {}\n'
+                 'print(time.perf_counter() - start, "tkinter" in sys.modules)')
+
+
+def corpus_names():
+    """Returns the names of the bundled corpora (their file names without
+    the .txt or packed extension)"""
+    return sorted({os.path.splitext(name)[0] for name in os.listdir(CORPUS_DIR) if name.endswith(('.txt', PACKED_EXTENSION))})
+
+
+def load_corpus(name):
+    """Returns the board strings of a bundled corpus, read from its text file
+    or else its packed file"""
+    path = os.path.join(CORPUS_DIR, name + '.txt')
+    if not os.path.exists(path):
+        with Packed_corpus(os.path.join(CORPUS_DIR, name + PACKED_EXTENSION)) as corpus:
+            return list(corpus)
+    with open(path) as corpus_file:
+        return list(read_puzzles(corpus_file))
+
+
+def percentile(ordered, percent):
+    """Returns the nearest-rank percentile of a sorted list"""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+def median(values):
+    """Returns the median of a list of numbers (the upper one of an even
+    count)"""
+    return sorted(values)[len(values) // 2]
+
+
+def time_pass(sudoku, boards):
+    """Solves every board once, returning the timing metrics of the pass"""
+    latencies = []
+    start = time.perf_counter()
+    for board in boards:
+        sudoku.current_board = board
+        solve_start = time.perf_counter()
+        sudoku.solve()
+        latencies.append(time.perf_counter() - solve_start)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    metrics = {
+        'mean_ms': 1000 * sum(latencies) / len(latencies),
+        'max_ms': 1000 * latencies[-1],
+        'throughput': len(latencies) / elapsed,
+    }
+    for percent in PERCENTILES:
+        metrics['p{}_ms'.format(percent)] = 1000 * percentile(latencies, percent)
+    return metrics
+
+
+def run_corpus(boards, engine_options, repeat=REPEAT):
+    """Solves every board once to count nodes and failures, then repeat
+    timed times, then once more while tracing memory. Returns a dictionary
+    of the corpus metrics, each timing the median over the timed passes so
+    that one slow pass does not register as a regression"""
+    sudoku = Sudoku_engine(**engine_options)
+    nodes = []
+    failures = 0
+    for board in boards: #also warms up the engine before timing
+        sudoku.current_board = board
+        sudoku.solve()
+        nodes.append(sudoku.stats.nodes)
+        if sudoku.status_var != 'Completed Board':
+            failures += 1
+    passes = [time_pass(sudoku, boards) for run in range(repeat)]
+
+    tracemalloc.start() #in a separate pass, as tracing slows every allocation
+    for board in boards:
+        sudoku.current_board = board
+        sudoku.solve()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    metrics = {
+        'puzzles': len(boards),
+        'failures': failures,
+        'peak_memory_kb': peak_memory / 1024,
+        'mean_nodes': sum(nodes) / len(nodes),
+        'max_nodes': max(nodes),
+    }
+    for metric in passes[0]:
+        metrics[metric] = median([timings[metric] for timings in passes])
+    return metrics
+
+
+def import_time(module=IMPORT_MODULE, repeat=5):
+    """Imports the module in repeat fresh interpreters (after one untimed
+    import, so the bytecode can be cached), returning the median time taken in
+    milliseconds. Fails if the import brings in tkinter"""
+    times = []
+    for attempt in range(repeat + 1):
+        output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT.format(module)], check=True, capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        if output[1] == 'True':
+            raise RuntimeError('importing {} also imported tkinter'.format(module))
+        times.append(1000 * float(output[0]))
+    return median(times[1:])
+
+
+def run(names, engine_options, repeat=REPEAT):
+    """Benchmarks each named corpus and returns the results as a dictionary
+    ready to be written as JSON"""
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'engine_options': engine_options,
+        'repeat': repeat,
+        'import_ms': import_time(),
+        'corpora': {},
+    }
+    for name in names:
+        results['corpora'][name] = run_corpus(load_corpus(name), engine_options, repeat)
+    return results
+
+
+def worse(metric, before, after, threshold):
+    """Returns True if a lower-is-better metric rose by more than the
+    threshold fraction, and by more than its MIN_CHANGE"""
+    return after > before * (1 + threshold) and after - before > MIN_CHANGE.get(metric, 0)
+
+
+def compare(baseline, current, threshold):
+    """Returns a message for every metric of a corpus in both result sets
+    that is worse in current than in baseline by more than the threshold
+    fraction (and, for timings, by more than MIN_CHANGE)"""
+    regressions = []
+    if 'import_ms' in baseline and worse('import_ms', baseline['import_ms'], current['import_ms'], threshold):
+        regressions.append('import_ms rose from {:.3f} to {:.3f}'.format(baseline['import_ms'], current['import_ms']))
+    for name, before in sorted(baseline['corpora'].items()):
+        after = current['corpora'].get(name)
+        if after is None:
+            continue
+        for metric in LOWER_IS_BETTER:
+            if worse(metric, before[metric], after[metric], threshold):
+                regressions.append('{}: {} rose from {:.3f} to {:.3f}'.format(name, metric, before[metric], after[metric]))
+        for metric in HIGHER_IS_BETTER:
+            #as time per puzzle, so that the MIN_CHANGE of mean_ms applies
+            if after[metric] < before[metric] * (1 - threshold) and worse('mean_ms', 1000 / before[metric], 1000 / after[metric], 0):
+                regressions.append('{}: {} fell from {:.3f} to {:.3f}'.format(name, metric, before[metric], after[metric]))
+    return regressions
+
+
+def format_table(results):
+    """Returns the results as a table of the main metrics, one corpus per line"""
+    columns = ('puzzles', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'throughput', 'peak_memory_kb', 'mean_nodes')
+    lines = ['{:<10}'.format('corpus') + ''.join('{:>15}'.format(column) for column in columns)]
+    for name, metrics in sorted(results['corpora'].items()):
+        lines.append('{:<10}'.format(name) + ''.join('{:>15.3f}'.format(metrics[column]) for column in columns))
+    lines.append('import of {}: {:.3f} ms'.format(IMPORT_MODULE, results['import_ms']))
+    return '\n'.join(lines)
+
+
+def main():
+    """Runs or compares benchmarks from the command line"""
+    parser = argparse.ArgumentParser(description='Benchmarks the sudoku engine over the bundled corpora.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='benchmark the engine and write the results as JSON')
+    run_parser.add_argument('--corpus', action='append', choices=corpus_names(), help='corpus to run (default: all)')
+    run_parser.add_argument('--output', help='file to write the JSON results to')
+    run_parser.add_argument('--repeat', type=int, default=REPEAT, help='number of timed passes over each corpus, whose medians are reported')
+    add_engine_arguments(run_parser, solving=False)
+
+    compare_parser = commands.add_parser('compare', help='fail if any metric regressed between two result files')
+    compare_parser.add_argument('baseline', help='JSON results to compare against')
+    compare_parser.add_argument('current', help='JSON results of the change being tested')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='allowed fraction a metric may worsen by')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        if args.repeat < 1:
+            parser.error('--repeat must be at least 1')
+        engine_options = engine_options_from_args(parser, args)[0]
+        results = run(args.corpus or corpus_names(), engine_options, args.repeat)
+        print(format_table(results))
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                json.dump(results, output_file, indent=2)
+        return 0
+
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        baseline = json.load(baseline_file)
+        current = json.load(current_file)
+    regressions = compare(baseline, current, args.threshold)
+    for regression in regressions:
+        print(regression)
+    if regressions:
+        return 1
+    print('No regressions beyond {:.0%}'.format(args.threshold))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
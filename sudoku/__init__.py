@@ -0,0 +1,10 @@
+""" A sudoku solver and assistant. The engine is importable without tkinter:
+    solve(board) solves a single board string, Sudoku_engine gives finer
+    control, Solution_cache answers puzzles equivalent to ones already
+    solved, sudoku.batch solves streams of puzzles, and sudoku.gui holds the
+    GUI (run with python3 -m sudoku).
+"""
+
+from .cache import Board_transform, Solution_cache, canonical_form
+from .engine import (BACKENDS, DEFAULT_TECHNIQUES, TECHNIQUES, Dancing_links, Search_stopped, Solve_result, Solve_stats,
+                     Sudoku_engine, parse_board, solve)
@@ -0,0 +1,329 @@
+""" Solves streams of puzzles without the GUI: across worker processes, with
+    an optional NumPy propagation pass over whole chunks of boards, writing a
+    line of results per puzzle.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from collections import deque
+from functools import lru_cache
+import json
+import os
+import sys
+import threading
+import time
+
+from .cache import Solution_cache
+from .parallel import Parallel_solver
+from .engine import (ALL_DIGITS, BIT_COUNTS, BIT_DIGITS, BLOCK_OF, COLUMN_OF, DIGIT_BITS, RESULT_STATUSES, ROW_OF, UNITS,
+                     Solve_stats, Sudoku_engine, parse_board)
+
+FLUSH_INTERVAL = 1.0 #seconds of batch output that may be held back before flushing
+CHUNKS_PER_WORKER = 4 #chunks queued for each worker process before waiting on results
+VECTOR_CHUNK_SIZE = 4096 #boards propagated together by solve_puzzles_vectorized
+
+#statuses returned by propagate_boards
+NEEDS_SEARCH = 0
+SOLVED = 1
+CONTRADICTION = 2
+
+
+def read_puzzles(lines, box=3):
+    """Yields a board string (for the given box size) for each non-blank
+    line, one line at a time"""
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield parse_board(line, box)
+
+
+def solve_puzzles(boards, engine_options=None, cache_options=None):
+    """Solves each board with a single engine (created with the keyword
+    arguments in engine_options), yielding the given board, the resulting
+    board, a status ('solved', 'unsolvable', 'invalid', or 'timeout' if the
+    engine's time_budget ran out), the time taken, and a dictionary of the
+    solve's stats. If cache_options holds the
+    keyword arguments of a Solution_cache, boards are looked up in the
+    process's cache first, and the stats say whether each was cached"""
+    if cache_options:
+        yield from _solve_cached(boards, engine_options or {}, _process_cache(**cache_options))
+        return
+
+    sudoku = Sudoku_engine(**(engine_options or {}))
+    for board in boards:
+        sudoku.current_board = board
+        stats = sudoku.solve()
+        yield board, sudoku.current_board, RESULT_STATUSES[sudoku.status_var], stats.time_taken, stats.as_dict()
+
+
+def _solve_cached(boards, engine_options, cache):
+    """Gives the results of solve_puzzles through a Solution_cache"""
+    for board in boards:
+        misses = cache.misses
+        result = cache.solve(board, **engine_options)
+        stats = result.stats.as_dict()
+        stats['cached'] = cache.misses == misses
+        yield board, result.solution or result.board, result.status, result.stats.time_taken, stats
+
+
+@lru_cache(maxsize=None)
+def _process_cache(maxsize=4096, path=None):
+    """Returns the Solution_cache of this process for the given options, so
+    that every chunk a worker solves shares it"""
+    return Solution_cache(maxsize, path)
+
+
+@lru_cache(maxsize=None)
+def _vector_tables():
+    """Returns the lookup tables used by propagate_boards as numpy arrays"""
+    import numpy
+    unit_cells = numpy.array(UNITS) #the 9 squares of each of the 27 units
+    cell_units = numpy.array([[ROW_OF[index], 9 + COLUMN_OF[index], 18 + BLOCK_OF[index]] for index in range(81)])
+    digit_bits = numpy.array(DIGIT_BITS, dtype=numpy.uint16)
+    bit_counts = numpy.array(BIT_COUNTS, dtype=numpy.uint8)
+    bit_digits = numpy.array([BIT_DIGITS.get(mask, 0) for mask in range(ALL_DIGITS + 1)], dtype=numpy.uint8)
+    return unit_cells, cell_units, digit_bits, bit_counts, bit_digits
+
+
+def propagate_boards(boards):
+    """Places the digits that are the only candidate for their square, and the
+    digits with only one square left in a row, column, or block (hidden
+    singles), on every board of an (N, 81) array of digits at once,
+    repeating until no board changes. Returns the propagated boards, the
+    candidate masks of their squares, and a status for each board
+    (NEEDS_SEARCH, SOLVED, or CONTRADICTION). Requires numpy."""
+    import numpy
+    unit_cells, cell_units, digit_bits, bit_counts, bit_digits = _vector_tables()
+
+    boards = numpy.array(boards, dtype=numpy.uint8)
+    boards[boards > 9] = 0
+    candidates = numpy.zeros(boards.shape, dtype=numpy.uint16)
+    status = numpy.full(len(boards), NEEDS_SEARCH, dtype=numpy.uint8)
+    active = numpy.arange(len(boards)) #boards that changed in the last pass
+
+    while len(active):
+        board = boards[active]
+        empty = board == 0
+        bits = digit_bits[board]
+        unit_used = numpy.bitwise_or.reduce(bits[:, unit_cells], axis=2)
+        repeated = (bit_counts[unit_used] != (~empty)[:, unit_cells].sum(axis=2)).any(axis=1)
+        cell_used = numpy.bitwise_or.reduce(unit_used[:, cell_units], axis=2)
+        remaining = numpy.where(empty, ALL_DIGITS & ~cell_used, bits)
+        counts = bit_counts[remaining]
+
+        contradiction = repeated | (empty & (counts == 0)).any(axis=1)
+        singles = empty & (counts == 1) & ~contradiction[:, None]
+        board[singles] = bit_digits[remaining[singles]] #every single is decided from the same board
+        changed = singles.any(axis=1)
+
+        stuck = (~changed & ~contradiction & empty.any(axis=1)).nonzero()[0] #boards left for hidden singles
+        if len(stuck):
+            #for each unit and digit, the squares of the unit that could hold the digit
+            places = (remaining[stuck][:, unit_cells, None] & digit_bits[1:10]).astype(bool) & empty[stuck][:, unit_cells, None]
+            place_counts = places.sum(axis=2)
+            missing = ((place_counts == 0) & ~(unit_used[stuck][:, :, None] & digit_bits[1:10]).astype(bool)).any(axis=(1, 2))
+            contradiction[stuck[missing]] = True
+            found, unit, digit = ((place_counts == 1) & ~missing[:, None, None]).nonzero()
+            squares = unit_cells[unit, places[found, unit, :, digit].argmax(axis=1)]
+            board[stuck[found], squares] = digit + 1 #a square that is a hidden single for two digits is caught on the next pass
+            changed[stuck[found]] = True
+
+        boards[active] = board
+        candidates[active] = remaining
+        status[active[contradiction]] = CONTRADICTION
+        status[active[~changed & ~contradiction & ~empty.any(axis=1)]] = SOLVED
+        active = active[changed]
+
+    return boards, candidates, status
+
+
+def solve_puzzles_vectorized(boards, engine_options=None, chunk_size=VECTOR_CHUNK_SIZE):
+    """Gives the same results as solve_puzzles, but each chunk of boards is
+    first run through propagate_boards together. Only the boards that still
+    need a search are passed to the engine. Requires numpy."""
+    import numpy
+    sudoku = Sudoku_engine(**(engine_options or {}))
+    for chunk in _chunked(boards, chunk_size):
+        start = time.time()
+        digits = numpy.frombuffer(''.join(chunk).encode('ascii', 'replace'), dtype=numpy.uint8) - ord('0')
+        propagated, candidates, status = propagate_boards(digits.reshape(-1, 81))
+        propagated_boards = (propagated + ord('0')).tobytes().decode('ascii')
+        shared_time = (time.time() - start) / len(chunk)
+
+        for number, board in enumerate(chunk):
+            propagated_board = propagated_boards[81 * number:81 * (number + 1)]
+            if status[number] == SOLVED:
+                stats = Solve_stats()
+                stats.propagation_time = stats.time_taken = shared_time
+                yield board, propagated_board, 'solved', shared_time, stats.as_dict()
+                continue
+
+            #contradictions are passed on as given so the engine can tell invalid from unsolvable boards
+            sudoku.current_board = propagated_board if status[number] == NEEDS_SEARCH else board
+            stats = sudoku.solve()
+            result_status = RESULT_STATUSES[sudoku.status_var]
+            result = sudoku.current_board if result_status == 'solved' else board
+            yield board, result, result_status, shared_time + stats.time_taken, stats.as_dict()
+
+
+def _solve_chunk(chunk, vectorized=False, engine_options=None, cache_options=None):
+    """Solves a list of (puzzle number, board) pairs in a worker process"""
+    boards = [board for number, board in chunk]
+    if vectorized:
+        results = solve_puzzles_vectorized(boards, engine_options)
+    else:
+        results = solve_puzzles(boards, engine_options, cache_options)
+    return [(number,) + result for (number, board), result in zip(chunk, results)]
+
+
+def _chunked(items, chunk_size):
+    """Yields lists of up to chunk_size items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _collect(pending, ordered):
+    """Waits for the oldest pending chunk (or any chunk if not ordered) and
+    returns its results"""
+    if ordered:
+        return pending.popleft().result()
+
+    done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+    results = []
+    for future in done:
+        pending.remove(future)
+        results.extend(future.result())
+    return results
+
+
+def solve_batch(boards, workers=None, chunk_size=32, ordered=True, vectorized=False, engine_options=None,
+                cache_options=None, parallel=None):
+    """Solves a stream of boards across worker processes (one per CPU when
+    workers is None), yielding the puzzle number, given board, resulting
+    board, status, time taken, and stats for each. Boards are sent in chunks of
+    chunk_size, and only a few chunks per worker are read ahead so memory
+    does not grow with the input. If ordered is False, results are yielded
+    as soon as their chunk completes, so a slow puzzle only holds back its
+    own chunk. If vectorized is set, boards are solved with
+    solve_puzzles_vectorized (one chunk at a time in each worker).
+    engine_options holds keyword arguments for each Sudoku_engine, and
+    cache_options those of the Solution_cache each process solves through
+    (which the vectorized solver does not use). Vectorized solving and
+    caching only handle 9x9 boards.
+    If parallel is 'split' or 'portfolio', boards are instead solved one at
+    a time by a Parallel_solver using every worker, which cuts the time
+    taken by each hard board rather than by the whole batch."""
+    if vectorized and cache_options:
+        raise ValueError('Solution caching cannot be combined with vectorized solving')
+    if parallel is not None:
+        if vectorized or cache_options:
+            raise ValueError('Parallel solving of single boards cannot be combined with vectorized solving or caching')
+        with Parallel_solver(workers, portfolio=parallel == 'portfolio' or None, **(engine_options or {})) as solver:
+            for number, board in enumerate(boards):
+                result = solver.solve(board)
+                yield number, board, result.solution or result.board, result.status, result.stats.time_taken, result.stats.as_dict()
+        return
+    if (vectorized or cache_options) and (engine_options or {}).get('box', 3) != 3:
+        raise ValueError('Vectorized solving and caching only handle 9x9 boards')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        if vectorized:
+            results = solve_puzzles_vectorized(boards, engine_options)
+        else:
+            results = solve_puzzles(boards, engine_options, cache_options)
+        for number, result in enumerate(results):
+            yield (number,) + result
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for chunk in _chunked(enumerate(boards), chunk_size):
+            pending.append(executor.submit(_solve_chunk, chunk, vectorized, engine_options, cache_options))
+            while len(pending) >= CHUNKS_PER_WORKER * workers:
+                yield from _collect(pending, ordered)
+        while pending:
+            yield from _collect(pending, ordered)
+
+
+def format_results(results, numbered=False, with_stats=False):
+    """Yields a tab separated output line for each solve result, starting
+    with the puzzle number if numbered is set, and ending with the solve's
+    stats as JSON if with_stats is set"""
+    for number, board, result, status, time_taken, stats in results:
+        line = '{}\t{}\t{:.6f}'.format(result, status, time_taken)
+        if numbered:
+            line = '{}\t{}'.format(number, line)
+        if with_stats:
+            line = '{}\t{}'.format(line, json.dumps(stats, separators=(',', ':')))
+        yield line + '\n'
+
+
+def write_lines(lines, stream, flush_every=100):
+    """Writes lines to the stream as they are produced, flushing after every
+    flush_every lines so that readers can start on partial output. Lines are
+    also flushed by a background thread at most FLUSH_INTERVAL seconds after
+    they are written, as the next line may be held up by a slow puzzle"""
+    lock = threading.Lock()
+    finished = threading.Event()
+    unflushed = [0] #lines written since the last flush, shared with the thread
+
+    def flush_regularly():
+        while not finished.wait(FLUSH_INTERVAL):
+            with lock:
+                if unflushed[0]:
+                    try:
+                        stream.flush()
+                    except (OSError, ValueError): #the reader has gone, which the next write reports
+                        return
+                    unflushed[0] = 0
+
+    flusher = threading.Thread(target=flush_regularly, daemon=True)
+    flusher.start()
+    try:
+        for line in lines:
+            with lock:
+                stream.write(line)
+                unflushed[0] += 1
+                if unflushed[0] >= flush_every:
+                    stream.flush()
+                    unflushed[0] = 0
+    finally:
+        finished.set()
+        flusher.join()
+    stream.flush()
+
+
+def batch_solve(path, flush_every=100, workers=1, chunk_size=32, ordered=True, vectorized=False, engine_options=None,
+                with_stats=False, cache_options=None, parallel=None):
+    """Solves every puzzle in a file ('-' for stdin) and writes the results to
+    stdout without holding more than a few chunks of puzzles in memory.
+    Unordered results are numbered by their position in the file. Files in
+    the packed format of sudoku.corpus are read through mmap instead"""
+    box = (engine_options or {}).get('box', 3)
+    if path != '-':
+        from .corpus import Packed_corpus, is_packed #imports this module, so only imported here
+        if is_packed(path):
+            with Packed_corpus(path) as corpus:
+                if corpus.box != box:
+                    raise ValueError("'{}' holds boards with box size {}, not {}".format(path, corpus.box, box))
+                results = solve_batch(iter(corpus), workers, chunk_size, ordered, vectorized, engine_options,
+                                      cache_options, parallel)
+                write_lines(format_results(results, not ordered, with_stats), sys.stdout, flush_every)
+            return
+
+    if path == '-':
+        puzzle_file = sys.stdin
+    else:
+        puzzle_file = open(path)
+
+    with puzzle_file:
+        boards = read_puzzles(puzzle_file, box)
+        results = solve_batch(boards, workers, chunk_size, ordered, vectorized, engine_options,
+                              cache_options, parallel)
+        write_lines(format_results(results, not ordered, with_stats), sys.stdout, flush_every)
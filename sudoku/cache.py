@@ -0,0 +1,333 @@
+""" A cache of solutions shared between puzzles that are the same up to the
+    symmetries of sudoku: relabelling the digits, swapping rows within a band
+    or columns within a stack, swapping bands or stacks, and transposing.
+    Each board is mapped to a canonical form, whose solution is kept in memory
+    (evicting the least recently used) and optionally in an sqlite file that
+    lasts between runs.
+"""
+
+from collections import OrderedDict
+from itertools import permutations, product
+from math import factorial, prod
+import time
+
+from .engine import DEFAULT_TECHNIQUES, Solve_result, Solve_stats, parse_board, solve
+
+MAX_STATES = 64 #tied partial boards kept before a board is too symmetric to be worth a canonical form
+
+
+class Board_transform:
+    """A symmetry taking a board to its canonical form. The canonical board's
+    square (r, c) comes from square (rows[r], columns[c]) of the board (after
+    transposing it, if transposed is set), with digit d written as
+    labels[d]"""
+    def __init__(self, transposed, rows, columns, labels):
+        self.transposed = transposed
+        self.rows = rows
+        self.columns = columns
+        self.labels = labels
+        self.digits = [0] * 10 #the inverse of labels
+        for digit in range(10):
+            self.digits[labels[digit]] = digit
+
+
+    def _sources(self):
+        """Returns the square of the board that each canonical square comes
+        from"""
+        if self.transposed:
+            return [9 * column + row for row in self.rows for column in self.columns]
+        return [9 * row + column for row in self.rows for column in self.columns]
+
+
+    def apply(self, board):
+        """Returns the canonical form of a board string with the same clues"""
+        labels = self.labels
+        return ''.join([str(labels[int(board[index])]) for index in self._sources()])
+
+
+    def revert(self, board):
+        """Returns the board string that apply would have taken to the given
+        canonical board"""
+        cells = ['0'] * 81
+        digits = self.digits
+        for position, index in enumerate(self._sources()):
+            cells[index] = str(digits[int(board[position])])
+        return ''.join(cells)
+
+
+def _keys(grid):
+    """Returns a key for each row of a grid (its number of clues, and the
+    sorted numbers of clues in each stack), and a key for each band (the
+    sorted keys of its rows). Neither changes under relabelling or any
+    reordering of the columns"""
+    row_keys = [(sum(1 for digit in row if digit),
+                 tuple(sorted(sum(1 for digit in row[start:start + 3] if digit) for start in (0, 3, 6))))
+                for row in grid]
+    band_keys = [tuple(sorted(row_keys[start:start + 3])) for start in (0, 3, 6)]
+    return row_keys, band_keys
+
+
+def _tied_orderings(items, key):
+    """Returns every ordering of items sorted by key, with items of equal key
+    taken in every possible order"""
+    groups = OrderedDict()
+    for item in sorted(items, key=key):
+        groups.setdefault(key(item), []).append(item)
+    return [sum(choice, ()) for choice in product(*[list(permutations(group)) for group in groups.values()])]
+
+
+def _ordering_count(items, key):
+    """Returns the number of orderings _tied_orderings would give, without
+    making them"""
+    counts = {}
+    for item in items:
+        counts[key(item)] = counts.get(key(item), 0) + 1
+    return prod(factorial(count) for count in counts.values())
+
+
+def _column_orderings(column_keys, stack_keys):
+    """Returns every order the columns of a grid may be taken in, sorting the
+    stacks and the columns of each stack by their keys"""
+    orderings = []
+    for stacks in _tied_orderings(range(3), stack_keys.__getitem__):
+        within = [_tied_orderings(range(3 * stack, 3 * stack + 3), column_keys.__getitem__) for stack in stacks]
+        orderings.extend(sum(choice, ()) for choice in product(*within))
+    return orderings
+
+
+def _merged(states):
+    """Keeps one of each group of partial boards with the same labels and the
+    same rows left to choose from, as they can only be finished the same
+    ways"""
+    merged = {}
+    for state in states:
+        order, columns, ordered, chosen, labels, used = state
+        band = chosen[-1] // 3 if len(chosen) % 3 else -1
+        started = tuple(sorted(ordered[row] for row in range(3 * band, 3 * band + 3) if row not in chosen)) if band >= 0 else ()
+        bands = tuple(sorted(tuple(sorted(ordered[3 * other:3 * other + 3])) for other in range(3)
+                             if other != band and 3 * other not in chosen and 3 * other + 1 not in chosen
+                             and 3 * other + 2 not in chosen))
+        merged.setdefault((labels, started, bands), state)
+    return list(merged.values())
+
+
+def canonical_form(board, max_states=MAX_STATES):
+    """Returns the canonical form of a board string and the Board_transform
+    that produces it. Equivalent boards share a canonical form. Of the
+    symmetries that sort the bands, stacks, rows, and columns by their
+    numbers of clues (trying each order among ties), the one that gives the
+    lowest board, with digits relabelled in the order they first appear, is
+    chosen. Rows are picked one at a time, keeping only the partial boards
+    tied for the lowest so far, and merging those that can only go on to
+    the same rows.
+    Boards with many ties (such as full boards, or ones with few clues) can
+    take far longer than solving, so (None, None) is returned instead if
+    more than max_states partial boards are ever tied."""
+    digits = [int(character) for character in parse_board(board)]
+    grid = [digits[start:start + 9] for start in range(0, 81, 9)]
+    orientations = []
+    for transposed, oriented in ((False, grid), (True, [list(column) for column in zip(*grid)])):
+        row_keys, band_keys = _keys(oriented)
+        column_keys, stack_keys = _keys([list(column) for column in zip(*oriented)])
+        signature = (sorted(band_keys), sorted(stack_keys))
+        orientations.append((signature, transposed, oriented, row_keys, band_keys, column_keys, stack_keys))
+    lowest = min(orientation[0] for orientation in orientations)
+    tied = sum(_ordering_count(range(3), stack_keys.__getitem__) *
+               prod(_ordering_count(range(3 * stack, 3 * stack + 3), column_keys.__getitem__) for stack in range(3))
+               for signature, transposed, oriented, row_keys, band_keys, column_keys, stack_keys in orientations
+               if signature == lowest)
+    if tied > max_states:
+        return None, None
+
+    #a partial board is (orientation, column order, rows in that order, rows chosen so far, labels so far, labels used)
+    states = []
+    for signature, transposed, oriented, row_keys, band_keys, column_keys, stack_keys in orientations:
+        if signature == lowest:
+            order = (transposed, row_keys, band_keys, sorted(band_keys))
+            for columns in _column_orderings(column_keys, stack_keys):
+                ordered = [tuple([row[column] for column in columns]) for row in oriented]
+                states.append((order, columns, ordered, (), (0,) * 10, 0))
+
+    canonical = []
+    for position in range(9):
+        states = _merged(states)
+        if len(states) > max_states:
+            return None, None
+        best = None
+        next_states = []
+        for state in states:
+            order, columns, ordered, chosen, labels, used = state
+            transposed, row_keys, band_keys, band_order = order
+            if position % 3 == 0: #start the next band, taking the bands in order of their keys
+                chosen_bands = [row // 3 for row in chosen]
+                options = [row for band in range(3) if band not in chosen_bands and band_keys[band] == band_order[position // 3]
+                           for row in range(3 * band, 3 * band + 3) if row_keys[row] == band_keys[band][0]]
+            else:
+                band = chosen[-1] // 3
+                options = [row for row in range(3 * band, 3 * band + 3)
+                           if row not in chosen and row_keys[row] == band_keys[band][position % 3]]
+
+            for row in options:
+                new_labels = list(labels)
+                new_used = used
+                values = []
+                for digit in ordered[row]:
+                    if digit and not new_labels[digit]:
+                        new_used += 1
+                        new_labels[digit] = new_used
+                    values.append(new_labels[digit])
+                values = tuple(values)
+                if best is None or values < best:
+                    best = values
+                    next_states = []
+                if values == best:
+                    next_states.append((order, columns, ordered, chosen + (row,), tuple(new_labels), new_used))
+        canonical.extend(best)
+        states = next_states
+
+    order, columns, ordered, rows, labels, used = states[0]
+    labels = list(labels)
+    for digit in range(1, 10): #digits missing from the board take the labels left over
+        if not labels[digit]:
+            used += 1
+            labels[digit] = used
+    transform = Board_transform(order[0], rows, columns, labels)
+    return ''.join(map(str, canonical)), transform
+
+
+class Solution_cache:
+    """Remembers the solution (or status) of each canonical form it is given,
+    keeping up to maxsize of them in memory and, if path is given, all of
+    them in an sqlite file. hits counts boards found in memory, store_hits
+    those found only in the file, and misses those that had to be solved,
+    including the uncached ones too symmetric for a canonical form (also
+    counted by skipped). For a board with several solutions, the one found
+    for the first of its equivalent boards is given."""
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._memory = OrderedDict() #canonical board: (status, canonical solution or None), oldest first
+        self._store = None
+        if path is not None:
+            import sqlite3 #only needed for the persistent store
+            self._store = sqlite3.connect(path, timeout=30)
+            self._store.execute('PRAGMA journal_mode=WAL') #lets several processes share the file
+            self._store.execute('PRAGMA synchronous=NORMAL')
+            self._store.execute('CREATE TABLE IF NOT EXISTS solutions '
+                                '(canonical TEXT PRIMARY KEY, status TEXT NOT NULL, solution TEXT)')
+            self._store.commit()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *others):
+        self.close()
+
+
+    def close(self):
+        """Closes the persistent store, if there is one"""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+    def cache_info(self):
+        """Returns the hit and miss counts along with the size of the memory
+        cache"""
+        return {'hits': self.hits, 'store_hits': self.store_hits, 'misses': self.misses, 'skipped': self.skipped,
+                'size': len(self._memory), 'maxsize': self.maxsize}
+
+
+    def _remember(self, canonical, entry):
+        """Adds an entry to the memory cache, evicting the least recently used
+        if it is full"""
+        if self.maxsize <= 0:
+            return
+        self._memory[canonical] = entry
+        self._memory.move_to_end(canonical)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+
+    def _find(self, canonical):
+        """Returns the (status, solution) entry of a canonical board, or None,
+        counting the hit or miss. A canonical board of None (one that was not
+        worth finding) is always missed"""
+        if canonical is None:
+            self.skipped += 1
+            self.misses += 1
+            return None
+        entry = self._memory.get(canonical)
+        if entry is not None:
+            self._memory.move_to_end(canonical)
+            self.hits += 1
+            return entry
+        if self._store is not None:
+            row = self._store.execute('SELECT status, solution FROM solutions WHERE canonical = ?', (canonical,)).fetchone()
+            if row is not None:
+                entry = (row[0], row[1])
+                self._remember(canonical, entry)
+                self.store_hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+
+    def _add(self, canonical, entry):
+        """Keeps the entry of a canonical board in memory and in the store"""
+        self._remember(canonical, entry)
+        if self._store is not None:
+            self._store.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)', (canonical,) + entry)
+            self._store.commit()
+
+
+    def lookup(self, board):
+        """Returns the (status, solution) of a board string if it, or an
+        equivalent board, has been stored, otherwise None (as it is for boards
+        too symmetric for a canonical form)"""
+        canonical, transform = canonical_form(board)
+        entry = self._find(canonical)
+        if entry is None:
+            return None
+        status, solution = entry
+        return status, transform.revert(solution) if solution is not None else None
+
+
+    def store(self, board, status, solution):
+        """Stores the status ('solved', 'unsolvable', or 'invalid') and
+        solution (or None) of a board string, unless it is too symmetric for a
+        canonical form"""
+        canonical, transform = canonical_form(board)
+        if canonical is None:
+            return
+        self._add(canonical, (status, transform.apply(solution) if solution is not None else None))
+
+
+    def solve(self, board, backend='propagation', techniques=DEFAULT_TECHNIQUES, box=3, time_budget=None):
+        """Gives the same Solve_result as solve, taking it from the cache when
+        an equivalent board has already been solved. Results from the cache
+        carry stats with only the time taken filled in. Searches that run out
+        of time_budget are not stored. Only 9x9 boards (box 3) are handled"""
+        if box != 3:
+            raise ValueError('Solution_cache only handles 9x9 boards')
+        start = time.perf_counter()
+        board = parse_board(board)
+        canonical, transform = canonical_form(board)
+        entry = self._find(canonical)
+        if entry is None:
+            result = solve(board, backend, techniques, time_budget=time_budget)
+            if canonical is not None and result.status in ('solved', 'unsolvable', 'invalid'): #a timeout says nothing about the next attempt
+                solution = transform.apply(result.solution) if result.solution is not None else None
+                self._add(canonical, (result.status, solution))
+            return result
+
+        status, solution = entry
+        stats = Solve_stats()
+        stats.time_taken = time.perf_counter() - start
+        return Solve_result(board, transform.revert(solution) if solution is not None else None, status, stats)
@@ -0,0 +1,83 @@
+""" The command line interface: solves a file of puzzles, or opens the GUI when
+    no file is given.
+"""
+
+import argparse
+
+from .batch import batch_solve
+from .engine import BACKENDS, BOX_SIZES, DEFAULT_TECHNIQUES, TECHNIQUES
+
+
+def add_engine_arguments(parser, solving=True):
+    """Adds the options that configure each Sudoku_engine to parser: its backend
+    and techniques, and unless solving is False the board size, time budget,
+    and solution cache"""
+    parser.add_argument('--backend', choices=BACKENDS, default='propagation', help='search backend used by the engine')
+    parser.add_argument('--techniques', default=','.join(DEFAULT_TECHNIQUES),
+                        help='comma separated techniques applied between guesses, from: ' + ', '.join(TECHNIQUES))
+    if not solving:
+        return
+    parser.add_argument('--box', type=int, choices=BOX_SIZES, default=3,
+                        help='size of the blocks, which sets the board size (2 for 4x4, 3 for 9x9, 4 for 16x16, 5 for 25x25)')
+    parser.add_argument('--time-budget', type=float,
+                        help="seconds each puzzle may be searched for before it is given up with the status 'timeout'")
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='number of solutions kept in memory by each process to answer equivalent puzzles (0 for no cache)')
+    parser.add_argument('--cache-file', help='sqlite file that keeps solutions between runs')
+
+
+def engine_options_from_args(parser, args):
+    """Checks the options added by add_engine_arguments, reporting mistakes
+    through parser, and returns the keyword arguments of each Sudoku_engine
+    and of the Solution_cache (None when no cache is wanted)"""
+    techniques = [name for name in args.techniques.split(',') if name]
+    unknown = [name for name in techniques if name not in TECHNIQUES]
+    if unknown:
+        parser.error('unknown techniques: ' + ', '.join(unknown))
+    engine_options = {'backend': args.backend, 'techniques': techniques}
+    if not hasattr(args, 'box'): #added with solving=False
+        return engine_options, None
+    if args.time_budget is not None and args.time_budget <= 0:
+        parser.error('--time-budget must be above 0')
+    engine_options.update(box=args.box, time_budget=args.time_budget)
+    cache_options = None
+    if args.cache_size > 0 or args.cache_file:
+        if args.box != 3:
+            parser.error('--cache-size and --cache-file only handle 9x9 boards')
+        cache_options = {'maxsize': args.cache_size, 'path': args.cache_file}
+    return engine_options, cache_options
+
+
+def main():
+    """Sets everything in motion"""
+    parser = argparse.ArgumentParser(description='Sudoku solver. Opens the GUI unless a puzzle file is given.')
+    parser.add_argument('puzzles', nargs='?', help="file with one puzzle per line to solve without the GUI ('-' for stdin)")
+    parser.add_argument('--flush-every', type=int, default=100, help='number of output lines between flushes')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (0 for one per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=32, help='number of puzzles sent to a worker at a time')
+    parser.add_argument('--unordered', action='store_true', help='write results as they complete, prefixed with the puzzle number')
+    parser.add_argument('--vectorized', action='store_true', help='propagate whole chunks of puzzles at once with numpy before searching')
+    parser.add_argument('--parallel', choices=('split', 'portfolio'),
+                        help='solve one puzzle at a time across the workers, splitting its search between them '
+                             'or racing differently configured engines, to cut the time taken by hard puzzles')
+    parser.add_argument('--stats', action='store_true', help="end each line with the solve's stats as JSON")
+    add_engine_arguments(parser)
+    args = parser.parse_args()
+
+    if args.puzzles is not None:
+        if args.vectorized and args.box != 3:
+            parser.error('--vectorized only handles 9x9 boards')
+        engine_options, cache_options = engine_options_from_args(parser, args)
+        if args.vectorized and cache_options:
+            parser.error('--cache-size and --cache-file cannot be combined with --vectorized')
+        if args.parallel and (args.vectorized or cache_options):
+            parser.error('--parallel cannot be combined with --vectorized or the solution cache')
+        try:
+            batch_solve(args.puzzles, args.flush_every, args.workers or None, args.chunk_size, not args.unordered,
+                        args.vectorized, engine_options, args.stats, cache_options, args.parallel)
+        except ValueError as error: #such as a packed file of another board size
+            parser.error(str(error))
+        return
+
+    from .gui import run_gui #tkinter is only imported once the GUI is needed
+    run_gui(args.box)
@@ -0,0 +1,1175 @@
+""" The sudoku engine, with no GUI dependencies. Sudoku_engine holds a board
+    and can step through it, solve it, or count its solutions, while solve
+    is the simplest way to get the solution of a board string.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+import time
+
+BOX_SIZES = (2, 3, 4, 5) #boards of 4x4, 9x9, 16x16, and 25x25 squares
+SYMBOLS = '0123456789ABCDEFGHIJKLMNOP' #the character of each digit, so boards above 9x9 use letters after 9
+RESULT_STATUSES = {'Completed Board': 'solved', 'No Solution Found': 'unsolvable', 'Repeated Values': 'invalid',
+                   'Search Cancelled': 'cancelled', 'Time Budget Exceeded': 'timeout'}
+
+
+class _Bit_counter:
+    """Gives the number of set bits of a mask when indexed by it, as the
+    lists of _bit_counts do, but without a table"""
+    __getitem__ = staticmethod(getattr(int, 'bit_count', lambda mask: bin(mask).count('1')))
+
+
+def _bit_counts(size):
+    """Returns the number of set bits of every mask of size bits as a list,
+    which is the quickest to index. Above 16 bits the list would take too
+    much memory in every process, so a _Bit_counter is returned instead"""
+    if size > 16:
+        return _Bit_counter()
+    counts = [0]
+    for bit in range(size): #the counts of masks with this bit set are one more than those without
+        counts += [count + 1 for count in counts]
+    return counts
+
+
+class Board_geometry:
+    """The lookup tables for a board whose blocks are box by box squares, so
+    that each row, column, and block holds size = box * box squares and the
+    board holds size * size. Squares are numbered row by row, and digit d is
+    stored as bit d - 1 of a candidate mask."""
+    def __init__(self, box):
+        if box not in BOX_SIZES:
+            raise ValueError("Unsupported box size {}, expected one of {}".format(box, ', '.join(map(str, BOX_SIZES))))
+        size = box * box
+        squares = size * size
+        self.box = box
+        self.size = size
+        self.squares = squares
+        self.all_digits = (1 << size) - 1
+        self.was_empty = 1 << size #flags a trail entry whose square was empty before the change
+        self.digit_bits = [0] + [1 << (digit - 1) for digit in range(1, size + 1)]
+        self.bit_digits = {1 << (digit - 1): digit for digit in range(1, size + 1)}
+        self.bit_counts = _bit_counts(size)
+        self.symbols = SYMBOLS[:size + 1]
+        self.char_digits = {character: digit for digit, character in enumerate(self.symbols) if digit}
+        self.char_digits.update({character.lower(): digit for character, digit in self.char_digits.items()})
+
+        self.row_of = [index // size for index in range(squares)]
+        self.column_of = [index % size for index in range(squares)]
+        self.block_of = [box * (index // (box * size)) + (index % size) // box for index in range(squares)]
+        units = ([[index for index in range(squares) if self.row_of[index] == row] for row in range(size)] +
+                 [[index for index in range(squares) if self.column_of[index] == column] for column in range(size)] +
+                 [[index for index in range(squares) if self.block_of[index] == block] for block in range(size)])
+        self.units = units
+        self.unit_bits = [1 << self.row_of[index] | 1 << size + self.column_of[index] | 1 << 2 * size + self.block_of[index]
+                          for index in range(squares)] #bit u is set if the square is in units[u]
+        self.peers = [tuple(sorted(set(units[self.row_of[index]] + units[size + self.column_of[index]] +
+                                       units[2 * size + self.block_of[index]]) - {index}))
+                      for index in range(squares)]
+
+        #each row and column crosses box blocks in a segment of box squares, held as (squares, rest of the line, rest of the block)
+        self.segments = [(tuple(segment), tuple(index for index in units[line] if index not in segment),
+                          tuple(index for index in units[2 * size + block] if index not in segment))
+                         for line in range(2 * size) for block in sorted(set(self.block_of[index] for index in units[line]))
+                         for segment in [[index for index in units[line] if self.block_of[index] == block]]]
+        self.line_segments = [self.segments[box * line:box * line + box] for line in range(2 * size)]
+        self.block_segments = [[segment for segment in self.segments[start:start + box * size]
+                                if self.block_of[segment[0][0]] == block]
+                               for start in (0, box * size) for block in range(size)] #row segments of each block, then column
+
+
+    def mask_digits(self, mask):
+        """Returns the digits of a candidate mask in increasing order"""
+        digits = []
+        bit_digits = self.bit_digits
+        while mask:
+            bit = mask & -mask
+            digits.append(bit_digits[bit])
+            mask ^= bit
+        return digits
+
+
+@lru_cache(maxsize=None)
+def board_geometry(box):
+    """Returns the Board_geometry of a box size, building it only once"""
+    return Board_geometry(box)
+
+
+STANDARD = frozenset([str(number) for number in range(1, 10)]) #the digit characters of a 9x9 board
+
+#the tables of the standard 9x9 board, for code that only handles that size
+STANDARD_GEOMETRY = board_geometry(3)
+ALL_DIGITS = STANDARD_GEOMETRY.all_digits
+DIGIT_BITS = STANDARD_GEOMETRY.digit_bits
+BIT_DIGITS = STANDARD_GEOMETRY.bit_digits
+BIT_COUNTS = STANDARD_GEOMETRY.bit_counts
+ROW_OF = STANDARD_GEOMETRY.row_of
+COLUMN_OF = STANDARD_GEOMETRY.column_of
+BLOCK_OF = STANDARD_GEOMETRY.block_of
+UNITS = STANDARD_GEOMETRY.units
+PEERS = STANDARD_GEOMETRY.peers
+
+BACKENDS = ('propagation', 'dlx') #search backends that Sudoku_engine can solve with
+TECHNIQUES = ('hidden_singles', 'pointing', 'box_line', 'naked_pairs', 'hidden_pairs') #cheapest first
+DEFAULT_TECHNIQUES = ('hidden_singles', 'pointing', 'box_line')
+
+
+class Solve_stats:
+    """Counts the work done by one call to solve or count_solutions. Times are
+    in seconds, and the trace is only kept when the engine was created with
+    trace set."""
+    FIELDS = ('nodes', 'guesses', 'backtracks', 'contradictions', 'propagations', 'max_depth', 'propagation_time',
+              'search_time', 'time_taken')
+
+    def __init__(self, trace=False):
+        self.nodes = 0 #boards the search visited
+        self.guesses = 0 #candidates tried in squares with more than one
+        self.backtracks = 0 #guesses undone
+        self.contradictions = 0 #boards found to have no solution
+        self.propagations = 0 #digits placed by propagation
+        self.max_depth = 0 #most guesses in force at once
+        self.propagation_time = 0.0 #spent on propagation and techniques
+        self.search_time = 0.0 #spent on everything else
+        self.time_taken = 0.0
+        self.technique_counts = {}
+        self.trace = [] if trace else None #(event, details...) tuples in the order they happened
+
+
+    def as_dict(self):
+        """Returns the stats as a dictionary, including the trace only if it
+        was kept"""
+        stats = {field: getattr(self, field) for field in self.FIELDS}
+        stats['technique_counts'] = dict(self.technique_counts)
+        if self.trace is not None:
+            stats['trace'] = self.trace
+        return stats
+
+
+class Search_stopped(Exception):
+    """Raised by count_solutions when the search is cancelled or runs out of
+    time. status is 'cancelled' or 'timeout', as in RESULT_STATUSES"""
+    def __init__(self, status):
+        Exception.__init__(self, 'search {}'.format('cancelled' if status == 'cancelled' else 'ran out of time'))
+        self.status = status
+
+
+class Sudoku_engine:
+    """Holds the variables for; the current board, the possible suggestions, and
+    the status of the solution, along with the functions used to get closer to
+    a solution.
+    The board's shape is set by the box size given on creation (see
+    Board_geometry), 3 for the standard 9x9 board. The board is held as a list
+    of digits (0 for empty) along with a candidate mask for each cell. Placing
+    a digit only removes it from the square's peers, and any peer left with a
+    single candidate is queued for propagation. Every change is recorded on a
+    trail so that the search can undo back to an earlier board. The board
+    string is only produced when current_board is read.
+    solve and count_solutions search with the backend given on creation,
+    either 'propagation' (the search above) or 'dlx' (see Dancing_links).
+    Before each guess, the propagation backend also applies the logical
+    techniques given on creation (any of TECHNIQUES), and counts the progress
+    each makes in technique_counts.
+    The work done by the last solve or count_solutions is kept in stats (a
+    Solve_stats). The propagation backend also calls on_guess(square, digit,
+    depth), on_backtrack(square, digit, depth), and on_contradiction(depth)
+    if they are set, and records the same events in stats.trace if trace was
+    set on creation. With neither, a single flag is checked per guess.
+    solve and count_solutions give up once time_budget seconds have passed
+    (if it is set), or once cancel is called from another thread. Both are
+    checked at every node of the search, so the search stops within one
+    node's work. solve then restores the given board and sets status_var to
+    'Time Budget Exceeded' or 'Search Cancelled', while count_solutions
+    raises Search_stopped."""
+    def __init__(self, backend='propagation', techniques=DEFAULT_TECHNIQUES, trace=False, box=3, time_budget=None):
+        if backend not in BACKENDS:
+            raise ValueError("Unknown backend '{}', expected one of {}".format(backend, ', '.join(BACKENDS)))
+        for name in techniques:
+            if name not in TECHNIQUES:
+                raise ValueError("Unknown technique '{}', expected any of {}".format(name, ', '.join(TECHNIQUES)))
+        self.geometry = board_geometry(box)
+        self.backend = backend
+        self.techniques = [name for name in TECHNIQUES if name in techniques] #applied cheapest first
+        self._technique_steps = [(name, getattr(self, '_' + name)) for name in self.techniques]
+        self.technique_counts = {name: 0 for name in self.techniques}
+        self.last_technique = None
+        self.trace = trace
+        self.on_guess = None
+        self.on_backtrack = None
+        self.on_contradiction = None
+        self._observed = False
+        self.time_budget = time_budget
+        self._cancelled = False
+        self._deadline = None #perf_counter time the search must stop at, only set while solving or counting
+        self.stats = Solve_stats()
+        self.status_var = ""
+        self.time_taken = 0
+        self.current_board = ''
+
+
+    @property
+    def current_board(self):
+        """The board as a string of one character per square (see SYMBOLS),
+        with empty squares shown as '0' (or '_' if the last iteration asked for
+        suggestions)"""
+        marker = self._empty_marker
+        symbols = self.geometry.symbols
+        return ''.join([symbols[digit] if digit else marker for digit in self._cells])
+
+
+    @current_board.setter
+    def current_board(self, the_board):
+        """Loads a board string, treating any character that is not one of the
+        board's digits as an empty square"""
+        squares = self.geometry.squares
+        char_digits = self.geometry.char_digits
+        the_board = the_board[:squares].ljust(squares, '0')
+        self._load([char_digits.get(character, 0) for character in the_board])
+        self._empty_marker = '0'
+
+
+    @property
+    def suggestions(self):
+        """Maps each square to the list of digits that were possible for it
+        during the last iteration ([0] for squares that were already filled)"""
+        geometry = self.geometry
+        return {index: [geometry.symbols[digit] for digit in geometry.mask_digits(self._candidates[index])]
+                if not self._cells[index] else [0] for index in range(geometry.squares)}
+
+
+    def candidate_mask(self, index):
+        """Returns the candidate mask of a square (see Board_geometry), which
+        holds just the square's digit once it is filled"""
+        return self._candidates[index]
+
+
+    def _load(self, cells):
+        """Replaces the board with the given list of digits (one per square),
+        rebuilds every candidate mask from the row, column, and block masks,
+        and queues every square left with a single candidate"""
+        geometry = self.geometry
+        digit_bits, row_of, column_of, block_of = geometry.digit_bits, geometry.row_of, geometry.column_of, geometry.block_of
+        row_used = [0] * geometry.size
+        column_used = [0] * geometry.size
+        block_used = [0] * geometry.size
+        for index in range(geometry.squares):
+            bit = digit_bits[cells[index]]
+            row_used[row_of[index]] |= bit
+            column_used[column_of[index]] |= bit
+            block_used[block_of[index]] |= bit
+
+        candidates = [0] * geometry.squares
+        queue = []
+        contradiction = False
+        for index in range(geometry.squares):
+            if cells[index]:
+                candidates[index] = digit_bits[cells[index]]
+            else:
+                remaining = geometry.all_digits & ~(row_used[row_of[index]] | column_used[column_of[index]] |
+                                                    block_used[block_of[index]])
+                candidates[index] = remaining
+                if not remaining:
+                    contradiction = True
+                elif geometry.bit_counts[remaining] == 1:
+                    queue.append(index)
+
+        self._cells = cells
+        self._candidates = candidates
+        self._queue = queue
+        self._trail = []
+        self._pairs_checked = [] #trail lengths at which _hidden_pairs found nothing to remove, shortest first
+        self._contradiction = contradiction
+
+
+    def _undo(self, mark):
+        """Reverts every change recorded on the trail after the given length.
+        The trail holds (square, previous candidate mask) pairs, with the
+        geometry's was_empty bit added to the mask when the square itself was
+        filled in"""
+        cells = self._cells
+        candidates = self._candidates
+        trail = self._trail
+        was_empty = self.geometry.was_empty
+        while len(trail) > mark:
+            previous = trail.pop()
+            index = trail.pop()
+            if previous & was_empty:
+                cells[index] = 0
+                previous ^= was_empty
+            candidates[index] = previous
+        checked = self._pairs_checked
+        while checked and checked[-1] > mark:
+            checked.pop()
+        self._queue.clear()
+        self._contradiction = False
+
+
+    def _checkpoint(self):
+        """Returns what _rollback needs to bring back the current board"""
+        return (len(self._trail), self._queue[:], self._contradiction)
+
+
+    def _rollback(self, checkpoint):
+        """Brings back the board from when _checkpoint was called"""
+        mark, queue, contradiction = checkpoint
+        self._undo(mark)
+        self._queue = queue
+        self._contradiction = contradiction
+
+
+    def _assign(self, index, digit):
+        """Writes a digit into an empty square and removes it from the
+        candidates of the square's peers. Peers left with one candidate are
+        queued, and returns False if any peer is left with none"""
+        geometry = self.geometry
+        bit = geometry.digit_bits[digit]
+        bit_counts = geometry.bit_counts
+        cells = self._cells
+        candidates = self._candidates
+        trail = self._trail
+        trail.append(index)
+        trail.append(candidates[index] | geometry.was_empty)
+        cells[index] = digit
+        candidates[index] = bit
+
+        ok = True
+        for peer in geometry.peers[index]:
+            remaining = candidates[peer]
+            if remaining & bit and not cells[peer]:
+                trail.append(peer)
+                trail.append(remaining)
+                remaining ^= bit
+                candidates[peer] = remaining
+                if bit_counts[remaining] == 1:
+                    self._queue.append(peer)
+                elif not remaining:
+                    ok = False #can't continue with this board
+
+        if not ok:
+            self._contradiction = True
+        return ok
+
+
+    def _eliminate(self, index, mask):
+        """Removes the digits in mask from an empty square's candidates,
+        queueing the square if one is left and marking a contradiction if none
+        are. Returns the number of candidates removed"""
+        remaining = self._candidates[index]
+        removed = remaining & mask
+        if not removed or self._cells[index]:
+            return 0
+
+        self._trail.append(index)
+        self._trail.append(remaining)
+        remaining ^= removed
+        self._candidates[index] = remaining
+        bit_counts = self.geometry.bit_counts
+        if bit_counts[remaining] == 1:
+            self._queue.append(index)
+        elif not remaining:
+            self._contradiction = True
+        return bit_counts[removed]
+
+
+    def _propagate(self):
+        """Places the single candidate of every queued square, which may queue
+        further squares, until the queue is empty or a square has no
+        candidates left. Returns False on a contradiction"""
+        if self._contradiction:
+            return False
+        cells = self._cells
+        candidates = self._candidates
+        queue = self._queue
+        bit_digits = self.geometry.bit_digits
+        placed = 0
+        while queue:
+            index = queue.pop()
+            if cells[index]:
+                continue
+            remaining = candidates[index]
+            placed += 1
+            if not remaining or not self._assign(index, bit_digits[remaining]):
+                self._contradiction = True
+                queue.clear()
+                self.stats.propagations += placed
+                return False
+        self.stats.propagations += placed
+        return True
+
+
+    def iterate(self, suggestions_flag, *others):
+        """Places every digit that is the only one possible for its box. The
+        remaining candidates of the other boxes are kept (and displayed as
+        suggestions if suggestions_flag is set). Digits made certain by these
+        placements are left for the next iteration. If there are none to
+        place, the first of the engine's techniques that can make progress is
+        applied once instead, and its name is left in last_technique. Returns
+        the number of digits placed (or candidates removed)."""
+        cells = self._cells
+        candidates = self._candidates
+        geometry = self.geometry
+
+        self._empty_marker = '_' if suggestions_flag else '0'
+        singles = [index for index in range(geometry.squares)
+                   if not cells[index] and geometry.bit_counts[candidates[index]] == 1]
+        if singles:
+            for index in singles: #every single is decided from the same board
+                remaining = candidates[index]
+                if remaining: #another single in a shared row, column, or block may have taken this digit
+                    self._assign(index, geometry.bit_digits[remaining])
+            self.last_technique = 'naked_singles'
+            return len(singles)
+
+        self.last_technique = None
+        for name, technique in self._technique_steps:
+            made = technique()
+            if made or self._contradiction:
+                self.technique_counts[name] += made
+                self.last_technique = name
+                return made
+        return 0
+
+
+    def _deduce(self):
+        """Propagates the board, then applies the engine's techniques from
+        cheapest to most expensive, going back to propagation whenever one
+        makes progress, until none can. Returns False on a contradiction"""
+        while self._propagate():
+            for name, technique in self._technique_steps:
+                made = technique()
+                if made or self._contradiction:
+                    self.technique_counts[name] += made
+                    break
+            else:
+                return True
+        return False
+
+
+    def _hidden_singles(self):
+        """Places a digit wherever it fits in only one square of a row, column,
+        or block. Returns the number of digits placed"""
+        cells = self._cells
+        candidates = self._candidates
+        geometry = self.geometry
+        all_digits = geometry.all_digits
+        placed = 0
+        for unit in geometry.units:
+            once = twice = filled = 0
+            for index in unit:
+                remaining = candidates[index]
+                if cells[index]: #kept apart, so a unit that is nearly full has few hidden singles to look for
+                    filled |= remaining
+                else:
+                    twice |= once & remaining
+                    once |= remaining
+            if once | filled != all_digits: #a digit has nowhere to go
+                self._contradiction = True
+                return placed
+
+            hidden = once & ~twice & ~filled
+            if hidden:
+                for index in unit:
+                    bit = candidates[index] & hidden
+                    if bit and not cells[index] and bit != candidates[index]:
+                        if bit not in geometry.bit_digits: #two digits that only fit in the same square
+                            self._contradiction = True
+                            return placed
+                        placed += 1
+                        if not self._assign(index, geometry.bit_digits[bit]):
+                            return placed
+        return placed
+
+
+    def _pointing(self):
+        """Removes a digit from the rest of a row or column when every square
+        of a block that can hold it lies in that row or column. Returns the
+        number of candidates removed"""
+        return self._locked_candidates(self.geometry.block_segments, 1)
+
+
+    def _box_line(self):
+        """Removes a digit from the rest of a block when every square of a row
+        or column that can hold it lies in that block. Returns the number of
+        candidates removed"""
+        return self._locked_candidates(self.geometry.line_segments, 2)
+
+
+    def _locked_candidates(self, groups, rest):
+        """For each group of segments (those of a block, or those of a row or
+        column), removes any digit found in only one of the segments from the
+        squares at position rest of that segment's entry in the geometry's
+        segments"""
+        cells = self._cells
+        candidates = self._candidates
+        removed = 0
+        for group in groups:
+            masks = []
+            once = twice = 0
+            for squares, line, block in group:
+                mask = 0
+                for index in squares:
+                    if not cells[index]: #a placed digit is already gone from the rest of its line and block
+                        mask |= candidates[index]
+                masks.append(mask)
+                twice |= once & mask
+                once |= mask
+            unique = once & ~twice
+            if unique:
+                for position, mask in enumerate(masks):
+                    only = mask & unique
+                    if only:
+                        for index in group[position][rest]:
+                            if candidates[index] & only:
+                                removed += self._eliminate(index, only)
+            if self._contradiction:
+                break
+        return removed
+
+
+    def _naked_pairs(self):
+        """Removes a pair of digits from the rest of a row, column, or block
+        when two of its squares can only hold that pair. Returns the number of
+        candidates removed"""
+        cells = self._cells
+        candidates = self._candidates
+        bit_counts = self.geometry.bit_counts
+        removed = 0
+        for unit in self.geometry.units:
+            pairs = {}
+            for index in unit:
+                remaining = candidates[index]
+                if not cells[index] and bit_counts[remaining] == 2:
+                    if remaining in pairs:
+                        for other in unit:
+                            if other != index and other != pairs[remaining]:
+                                removed += self._eliminate(other, remaining)
+                        if self._contradiction:
+                            return removed
+                    else:
+                        pairs[remaining] = index
+        return removed
+
+
+    def _hidden_pairs(self):
+        """Removes every other digit from two squares of a row, column, or block
+        when they are the only squares that can hold a pair of digits. Returns
+        the number of candidates removed. Only the units with a square changed
+        since the last board it found nothing on are looked at"""
+        cells = self._cells
+        candidates = self._candidates
+        geometry = self.geometry
+        bit_counts = geometry.bit_counts
+        checked = self._pairs_checked
+        units = geometry.units
+        if checked:
+            unit_bits = geometry.unit_bits
+            touched = 0
+            for index in self._trail[checked[-1]::2]: #the trail holds (square, previous mask) pairs
+                touched |= unit_bits[index]
+            units = [unit for number, unit in enumerate(units) if touched >> number & 1]
+
+        removed = 0
+        for unit in units:
+            once = twice = thrice = 0
+            for index in unit:
+                if not cells[index]:
+                    remaining = candidates[index]
+                    thrice |= twice & remaining
+                    twice |= once & remaining
+                    once |= remaining
+            doubles = twice & ~thrice #digits that fit in exactly two squares
+            if bit_counts[doubles] < 2:
+                continue
+
+            #both squares of a hidden pair hold at least two of those digits, so only such squares are looked at
+            shared = [(position, candidates[index] & doubles) for position, index in enumerate(unit)
+                      if not cells[index] and bit_counts[candidates[index] & doubles] >= 2]
+            if len(shared) < 2:
+                continue
+            places = {} #the squares each of those digits fits in among them, as a bit mask of positions in the unit
+            for position, found in shared:
+                while found:
+                    bit = found & -found
+                    places[bit] = places.get(bit, 0) | 1 << position
+                    found ^= bit
+
+            pairs = {}
+            for bit, squares in places.items():
+                if bit_counts[squares] < 2: #the digit's other square holds none of the others
+                    continue
+                if squares not in pairs:
+                    pairs[squares] = bit
+                    continue
+                pair = bit | pairs[squares]
+                for position, index in enumerate(unit):
+                    if squares >> position & 1 and candidates[index] != pair:
+                        removed += self._eliminate(index, geometry.all_digits & ~pair)
+                if self._contradiction:
+                    return removed
+        if not removed and (not checked or checked[-1] < len(self._trail)):
+            checked.append(len(self._trail))
+        return removed
+
+
+    def check_complete(self, *others):
+        """Tests if every row, column, and block obeys the rules as a completed 
+        sudoku board. Updates the status label to inform the user of its 
+        findings, and returns true/false depending or complete/not complete"""
+        cells = self._cells
+        digit_bits = self.geometry.digit_bits
+        check_flag = True
+        for unit in self.geometry.units:
+            used = 0
+            for index in unit:
+                used |= digit_bits[cells[index]]
+            if used != self.geometry.all_digits:
+                check_flag = False
+                break
+
+        if check_flag:
+            message = 'Completed Board' #if altered, update display_solution with new marker
+        else:
+            message = 'Incomplete Board'
+        
+        self.status_var = message
+        return check_flag
+    
+    
+    def solve(self, *others):
+        """Solves a sudoku with a depth first search. After placing every digit
+        that is certain, the empty square with the fewest candidates is chosen
+        and each of its candidates is tried in turn, undoing the changes made
+        by a candidate before the next is tried. Every possibility is covered,
+        so a solution is always found if the board has one. Returns the
+        Solve_stats of the search."""
+        start = self._start_stats()
+
+        if not self.check_ok():
+            self.status_var = "Repeated Values"
+            return self._finish_stats(start)
+
+        checkpoint = self._checkpoint()
+        try:
+            if self.backend == 'dlx':
+                solution = self._dancing_links(1).solve()
+                if solution is not None:
+                    self._load(solution)
+                found = solution is not None
+            else:
+                found = self._search(1, 0) == 1
+                if not found:
+                    self._rollback(checkpoint) #bring back the given board
+        except Search_stopped as stopped:
+            self._rollback(checkpoint)
+            self.status_var = 'Search Cancelled' if stopped.status == 'cancelled' else 'Time Budget Exceeded'
+            return self._finish_stats(start)
+
+        if found:
+            self.check_complete()
+        else:
+            self.status_var = "No Solution Found"
+        return self._finish_stats(start)
+
+
+    def count_solutions(self, limit=2):
+        """Counts the solutions of the current board with the same search as
+        solve, stopping as soon as limit solutions are found (so a result of
+        limit means 'at least limit'). The board is left unchanged. Raises
+        Search_stopped if the search is cancelled or runs out of time."""
+        start = self._start_stats()
+        checkpoint = self._checkpoint()
+        try:
+            if not self.check_ok():
+                count = 0
+            elif self.backend == 'dlx':
+                count = self._dancing_links(limit).count(limit)
+            else:
+                count = self._search(limit, 0)
+                self._rollback(checkpoint)
+        except Search_stopped:
+            self._rollback(checkpoint)
+            raise
+        finally:
+            self._finish_stats(start)
+        return count
+
+
+    def has_unique_solution(self):
+        """Returns True if the current board has exactly one solution"""
+        return self.count_solutions(2) == 1
+
+
+    def has_other_solution(self, index, digit):
+        """Returns True if the current board has a solution with a digit other
+        than the given one in the given empty square. Searching for just one
+        such solution is much quicker than counting solutions, so this tells
+        whether emptying a square of a board with one solution kept it unique.
+        The board is left unchanged."""
+        with self._stats_set_aside():
+            checkpoint = self._checkpoint()
+            self._eliminate(index, self.geometry.digit_bits[digit])
+            found = self._search(1, 0) == 1
+            self._rollback(checkpoint)
+        return found
+
+
+    def split(self, count):
+        """Returns board strings that between them have every solution of the
+        current board, for searching separately. Boards are branched on as
+        _search would, deducing what it can and then filling in each candidate
+        of the square with the fewest candidates, taking the shallowest board
+        first until there are at least count boards or none can be branched
+        on. Boards found to have no solution are left out, so an empty list
+        means the board has none. The board is left unchanged."""
+        given = self.current_board
+        frontier = deque([given])
+        finished = [] #boards with no square left to branch on
+        with self._stats_set_aside():
+            while frontier and len(frontier) + len(finished) < count:
+                self.current_board = frontier.popleft()
+                if not self._deduce():
+                    continue
+                index = self._choose()
+                if index < 0:
+                    finished.append(self.current_board)
+                    continue
+                mark = len(self._trail)
+                for digit in self.geometry.mask_digits(self._candidates[index]):
+                    if self._assign(index, digit):
+                        frontier.append(self.current_board)
+                    self._undo(mark)
+        self.current_board = given
+        return finished + list(frontier)
+
+
+    def cancel(self):
+        """Asks the solve or count_solutions running in another thread to stop
+        at its next node. Has no effect on later searches"""
+        self._cancelled = True
+
+
+    def replay(self, trace):
+        """Yields the board string after each event of a trace kept by solve
+        or count_solutions (with the propagation backend and trace set),
+        along with the event, for watching a search step by step. The current
+        board must be the board that was searched, and the engine must use
+        the same techniques, so that deducing after each guess gives the
+        same boards the search saw. The board is left unchanged, and so are
+        the stats of the last search."""
+        with self._stats_set_aside():
+            checkpoint = self._checkpoint()
+            self._deduce()
+        marks = [] #the trail length before each guess in force, by depth
+        for event in trace:
+            with self._stats_set_aside():
+                if event[0] == 'guess':
+                    index, digit, depth = event[1:]
+                    del marks[depth:]
+                    marks.append(len(self._trail))
+                    self._assign(index, digit)
+                    self._deduce()
+                elif event[0] == 'backtrack':
+                    depth = event[3]
+                    self._undo(marks[depth])
+                    del marks[depth:]
+            yield event, self.current_board
+        self._rollback(checkpoint)
+
+
+    def _start_stats(self):
+        """Gives the engine fresh stats for a search and sets its deadline,
+        returning the start time"""
+        self.stats = Solve_stats(self.trace)
+        self._observed = self.trace or any(hook is not None for hook in (self.on_guess, self.on_backtrack, self.on_contradiction))
+        self._technique_counts_before = dict(self.technique_counts)
+        self._cancelled = False
+        start = time.perf_counter()
+        self._deadline = float('inf') if self.time_budget is None else start + self.time_budget
+        return start
+
+
+    @contextmanager
+    def _stats_set_aside(self):
+        """Counts the work of a search made for another purpose (such as
+        has_other_solution) in scratch stats, without calling the hooks, and
+        then puts back the stats and technique counts of the last solve or
+        count_solutions, so that stats already returned never change"""
+        stats, technique_counts, observed = self.stats, dict(self.technique_counts), self._observed
+        self.stats = Solve_stats()
+        self._observed = False
+        try:
+            yield
+        finally:
+            self.stats, self._observed = stats, observed
+            self.technique_counts.update(technique_counts)
+
+
+    def _finish_stats(self, start):
+        """Fills in the times and technique counts of the stats once a search
+        that began at start is over, and returns them"""
+        self._deadline = None
+        stats = self.stats
+        stats.time_taken = time.perf_counter() - start
+        stats.search_time = stats.time_taken - stats.propagation_time
+        stats.technique_counts = {name: self.technique_counts[name] - self._technique_counts_before[name]
+                                  for name in self.techniques}
+        self.time_taken = stats.time_taken
+        return stats
+
+
+    def _dancing_links(self, limit):
+        """Searches the current board for up to limit solutions with
+        Dancing_links, copying its counts into the stats (even if it is
+        stopped). Returns the finished Dancing_links"""
+        links = Dancing_links(self._cells, self.geometry.box)
+        links.check_stop = self._check_stop
+        try:
+            links.search(limit)
+        finally:
+            stats = self.stats
+            stats.nodes, stats.guesses, stats.backtracks, stats.max_depth = links.nodes, links.guesses, links.backtracks, links.max_depth
+        return links
+
+
+    def _check_stop(self, now=None):
+        """Raises Search_stopped if the running search was cancelled or has
+        passed its deadline. Searches not started by solve or count_solutions
+        (such as has_other_solution) are never stopped"""
+        if self._deadline is None:
+            return
+        if self._cancelled:
+            raise Search_stopped('cancelled')
+        if (time.perf_counter() if now is None else now) > self._deadline:
+            raise Search_stopped('timeout')
+
+
+    def _notify(self, event, *details):
+        """Records a search event in the trace (if kept) and passes its details
+        to the matching hook (if set)"""
+        if self.stats.trace is not None:
+            self.stats.trace.append((event,) + details)
+        hook = getattr(self, 'on_' + event)
+        if hook is not None:
+            hook(*details)
+
+
+    def _search(self, limit, depth):
+        """Deduces what it can from the current board, then tries each
+        candidate of the square with the fewest candidates until limit
+        solutions have been found. Returns the number found. If the limit is
+        reached, the board is left on the last solution, otherwise the caller
+        must undo the changes"""
+        stats = self.stats
+        stats.nodes += 1
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+
+        started = time.perf_counter()
+        if self._cancelled or self._deadline is not None and started > self._deadline:
+            self._check_stop(started)
+        consistent = self._deduce()
+        stats.propagation_time += time.perf_counter() - started
+        if not consistent:
+            stats.contradictions += 1
+            if self._observed:
+                self._notify('contradiction', depth)
+            return 0
+
+        index = self._choose()
+        if index < 0:
+            return 1
+
+        mark = len(self._trail)
+        count = 0
+        for digit in self.geometry.mask_digits(self._candidates[index]):
+            stats.guesses += 1
+            if self._observed:
+                self._notify('guess', index, digit, depth)
+            self._assign(index, digit) #a contradiction here is found by the next _deduce
+            count += self._search(limit - count, depth + 1)
+            if count >= limit:
+                return count
+            self._undo(mark)
+            stats.backtracks += 1
+            if self._observed:
+                self._notify('backtrack', index, digit, depth)
+        return count
+
+
+    def _choose(self):
+        """Returns the empty square with the fewest candidates, or -1 if the
+        board is full"""
+        cells = self._cells
+        candidates = self._candidates
+        bit_counts = self.geometry.bit_counts
+        best_index, best_count = -1, self.geometry.size + 1
+        for index in range(self.geometry.squares):
+            if not cells[index]:
+                count = bit_counts[candidates[index]]
+                if count < best_count:
+                    best_index, best_count = index, count
+                    if count <= 2:
+                        break
+        return best_index
+
+
+    def get_furthest(self):
+        """Places digits until no square with a single candidate is left, only
+        revisiting the squares affected by each placement, and applies the
+        engine's techniques until they make no more progress. Returns False if
+        the board turns out to be unsolvable"""
+        return self._deduce()
+
+
+    def update(self, entry_box, entry_value):
+        """Updates the sudoku board with the new digit, or an empty square if
+        input is invalid"""
+        digit = self.geometry.char_digits.get(entry_value, 0)
+        cells = self._cells
+        if not 0 <= entry_box < self.geometry.squares or digit == cells[entry_box]:
+            return
+        if digit and not cells[entry_box] and self._candidates[entry_box] & self.geometry.digit_bits[digit]:
+            self._assign(entry_box, digit) #placing a possible digit only affects its peers
+        else:
+            cells = cells[:] #removing a digit (or placing a clashing one) can affect any square, so start over
+            cells[entry_box] = digit
+            self._load(cells)
+
+
+    def board_parser(self, the_board):
+        """Returns 3 lists of size lists of size digits. One list for rows (from top to 
+        bottom), one for columns, from left to right, and one for blocks (from top 
+        left to bottom right)"""
+        units, size = self.geometry.units, self.geometry.size
+        return tuple([[the_board[index] for index in unit] for unit in units[start:start + size]] for start in (0, size, 2 * size))
+
+
+    def check_ok(self):
+        """Ensures that the entered board is not obviously un-solvable"""
+        cells = self._cells
+        digit_bits = self.geometry.digit_bits
+        all_ok = True
+        for unit in self.geometry.units:
+            used = 0
+            for index in unit:
+                bit = digit_bits[cells[index]]
+                if used & bit: #if there are duplicate digits
+                    all_ok = False
+                    self.status_var = "Invalid Board"
+                    break
+                used |= bit
+        
+        return all_ok    
+            
+
+class Dancing_links:
+    """Solves a board as an exact cover problem with Knuth's Algorithm X. Each
+    row places one digit in one square (729 of them on a 9x9 board), and
+    covers 4 columns (of 324): the square being filled, and the digit
+    appearing in the square's row, column, and block. The linked nodes are
+    held as parallel lists of indexes (node 0 is the root, then the column
+    headers, then the rows), and a fresh copy of a prebuilt structure is made
+    for each board."""
+    def __init__(self, cells, box=3):
+        """Copies the empty structure for the box size, then selects the rows
+        of the given digits"""
+        template = _dancing_links_template(box)
+        self.left, self.right, self.up, self.down, self.column, self.size = [links[:] for links in template[:6]]
+        self.row_of = template[6] #not changed by the search, so shared
+        self.digits = box * box
+        self.first_node = 4 * len(cells) + 1 #the first node of row 0, after the root and the column headers
+        self.solution = [index * self.digits + digit - 1 for index, digit in enumerate(cells) if digit]
+        self.count_found = 0
+        self.first_solution = None
+        self.nodes = 0 #calls to search
+        self.guesses = 0 #rows selected while searching
+        self.backtracks = 0 #selected rows removed again
+        self.max_depth = 0
+        self.check_stop = None #called at every node if set, and may raise to abandon the search
+
+        right = self.right
+        for row in self.solution:
+            node = self.first_node + 4 * row
+            self.cover(self.column[node])
+            other = right[node]
+            while other != node:
+                self.cover(self.column[other])
+                other = right[other]
+
+
+    def cover(self, column):
+        """Removes a column from the header list, and every row that covers
+        it from the other columns"""
+        left, right, up, down, node_column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[column]] = right[column]
+        left[right[column]] = left[column]
+        row = down[column]
+        while row != column:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                size[node_column[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+
+    def uncover(self, column):
+        """Reverses cover, relinking in the opposite order"""
+        left, right, up, down, node_column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        row = up[column]
+        while row != column:
+            node = left[row]
+            while node != row:
+                size[node_column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[column]] = column
+        left[right[column]] = column
+
+
+    def search(self, limit, depth=0):
+        """Selects rows until every column is covered, always branching on the
+        column with the fewest rows left. Stops once limit solutions have been
+        counted"""
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.check_stop is not None:
+            self.check_stop()
+        right, down, size = self.right, self.down, self.size
+        column = right[0]
+        if column == 0: #every column is covered
+            self.count_found += 1
+            if self.first_solution is None:
+                self.first_solution = self.solution[:]
+            return
+
+        best_size = size[column]
+        other = right[column]
+        while other != 0 and best_size > 1:
+            if size[other] < best_size:
+                column, best_size = other, size[other]
+            other = right[other]
+        if best_size == 0:
+            return
+
+        self.cover(column)
+        row = down[column]
+        while row != column and self.count_found < limit:
+            self.guesses += 1
+            self.solution.append(self.row_of[row])
+            node = right[row]
+            while node != row:
+                self.cover(self.column[node])
+                node = right[node]
+            self.search(limit, depth + 1)
+            node = self.left[row]
+            while node != row:
+                self.uncover(self.column[node])
+                node = self.left[node]
+            self.solution.pop()
+            self.backtracks += 1
+            row = down[row]
+        self.uncover(column)
+
+
+    def solve(self):
+        """Returns the digits of the first solution found, one per square
+        (searching for one if search has not been run), or None if there is
+        none"""
+        if not self.nodes:
+            self.search(1)
+        if self.first_solution is None:
+            return None
+        cells = [0] * (self.digits * self.digits)
+        for row in self.first_solution:
+            index, digit = divmod(row, self.digits)
+            cells[index] = digit + 1
+        return cells
+
+
+    def count(self, limit):
+        """Returns the number of solutions, stopping at limit (searching for
+        them if search has not been run)"""
+        if not self.nodes:
+            self.search(limit)
+        return self.count_found
+
+
+@lru_cache(maxsize=None)
+def _dancing_links_template(box):
+    """Builds the links for the full sudoku exact cover problem of a box size,
+    with a row for each digit of each square and 4 columns for each square
+    (729 by 324 for a 9x9 board). Row r places digit r % digits + 1 in square
+    r // digits, and its 4 nodes are numbered from columns + 1 + 4 * r"""
+    geometry = board_geometry(box)
+    digits, squares = geometry.size, geometry.squares
+    columns = 4 * squares
+    left = [columns] + list(range(columns))
+    right = list(range(1, columns + 1)) + [0]
+    up = list(range(columns + 1))
+    down = list(range(columns + 1))
+    column = list(range(columns + 1))
+    size = [0] * (columns + 1)
+    row_of = [-1] * (columns + 1)
+
+    for row in range(digits * squares):
+        index, digit = divmod(row, digits)
+        first = len(left)
+        row_columns = (1 + index, 1 + squares + digits * geometry.row_of[index] + digit,
+                       1 + 2 * squares + digits * geometry.column_of[index] + digit,
+                       1 + 3 * squares + digits * geometry.block_of[index] + digit)
+        for offset, header in enumerate(row_columns):
+            node = first + offset
+            left.append(first + (offset - 1) % 4)
+            right.append(first + (offset + 1) % 4)
+            up.append(up[header]) #append to the bottom of the column
+            down.append(header)
+            down[up[header]] = node
+            up[header] = node
+            column.append(header)
+            row_of.append(row)
+            size[header] += 1
+
+    return left, right, up, down, column, size, row_of
+
+
+def parse_board(text, box=3):
+    """Returns the board string for a line of text in the import format, one
+    character per square, where any character that is not one of the board's
+    digits (see SYMBOLS, in either case) is an empty square"""
+    geometry = board_geometry(box)
+    symbols, char_digits = geometry.symbols, geometry.char_digits
+    board = ''.join([symbols[char_digits.get(character, 0)] for character in text[:geometry.squares]])
+    return board + '0' * (geometry.squares - len(board))
+
+
+class Solve_result:
+    """The outcome of solve: the given board string, the solved board string
+    (None unless solved), a status ('solved', 'unsolvable', 'invalid',
+    'timeout', or 'cancelled'), and the Solve_stats of the search"""
+    def __init__(self, board, solution, status, stats):
+        self.board = board
+        self.solution = solution
+        self.status = status
+        self.stats = stats
+
+
+    def as_dict(self):
+        """Returns the result as a dictionary, with the stats as a dictionary"""
+        return {'board': self.board, 'solution': self.solution, 'status': self.status, 'stats': self.stats.as_dict()}
+
+
+def solve(board, backend='propagation', techniques=DEFAULT_TECHNIQUES, box=3, time_budget=None):
+    """Solves a board string in the import format (for the given box size)
+    with a fresh engine, so nothing is shared between calls, and returns a
+    Solve_result. If time_budget is set, the search gives up after that many
+    seconds with the status 'timeout'"""
+    board = parse_board(board, box)
+    sudoku = Sudoku_engine(backend, techniques, box=box, time_budget=time_budget)
+    sudoku.current_board = board
+    stats = sudoku.solve()
+    status = RESULT_STATUSES[sudoku.status_var]
+    return Solve_result(board, sudoku.current_board if status == 'solved' else None, status, stats)
@@ -0,0 +1,147 @@
+""" Generates puzzles with exactly one solution, rated by the work the engine
+    needs to solve them. Puzzles may be generated across worker processes
+    and are streamed as they are made, and the same seed always gives the
+    same puzzles.
+    Usage:
+        python3 -m sudoku.generate COUNT [--difficulty NAME] [--seed N] [--workers N]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import argparse
+import os
+import random
+import sys
+
+from .batch import CHUNKS_PER_WORKER, _collect, write_lines
+from .engine import BOX_SIZES, DEFAULT_TECHNIQUES, Sudoku_engine, board_geometry
+
+DIFFICULTIES = ('easy', 'medium', 'hard') #as for the bundled corpora
+TECHNIQUE_WEIGHTS = {'hidden_singles': 1, 'pointing': 4, 'box_line': 4} #score of each step made by a default technique
+GUESS_WEIGHT = 20 #score of each guess
+
+
+def random_grid(rng, box=3):
+    """Returns a random full board string. The blocks on the diagonal share no
+    row or column, so each is filled with a random order of the digits, and
+    the engine fills in the rest (trying again if it cannot, as happens with
+    some 4x4 boards)"""
+    geometry = board_geometry(box)
+    sudoku = Sudoku_engine(box=box)
+    while True:
+        cells = [0] * geometry.squares
+        for block in range(0, geometry.size, box + 1):
+            digits = list(range(1, geometry.size + 1))
+            rng.shuffle(digits)
+            for index, digit in zip(geometry.units[2 * geometry.size + block], digits):
+                cells[index] = digit
+
+        sudoku.current_board = ''.join([geometry.symbols[digit] for digit in cells])
+        sudoku.solve()
+        if sudoku.status_var == 'Completed Board':
+            return sudoku.current_board
+
+
+def remove_clues(grid, rng, box=3):
+    """Empties the squares of a full board string in a random order, putting
+    back each digit whose removal would allow a second solution. Returns the
+    resulting puzzle, from which no further digit can be removed"""
+    geometry = board_geometry(box)
+    sudoku = Sudoku_engine(techniques=DEFAULT_TECHNIQUES, box=box)
+    sudoku.current_board = grid
+    order = list(range(geometry.squares))
+    rng.shuffle(order)
+    for index in order:
+        sudoku.update(index, '0')
+        digit = geometry.char_digits[grid[index]]
+        if sudoku.has_other_solution(index, digit):
+            sudoku.update(index, grid[index])
+    return sudoku.current_board
+
+
+def rate_puzzle(board, box=3, sudoku=None):
+    """Solves a puzzle with the default techniques and returns its difficulty
+    and score. A puzzle is 'easy' if filling in squares with one candidate
+    solves it, 'medium' if it also needs the techniques but no guessing, and
+    'hard' if it needs guessing. The score adds TECHNIQUE_WEIGHTS for each
+    step made by a technique and GUESS_WEIGHT for each guess"""
+    if sudoku is None:
+        sudoku = Sudoku_engine(techniques=DEFAULT_TECHNIQUES, box=box)
+    sudoku.current_board = board
+    stats = sudoku.solve()
+    score = GUESS_WEIGHT * stats.guesses + sum(TECHNIQUE_WEIGHTS[name] * count for name, count in stats.technique_counts.items())
+    if stats.guesses:
+        difficulty = 'hard'
+    elif any(stats.technique_counts.values()):
+        difficulty = 'medium'
+    else:
+        difficulty = 'easy'
+    return difficulty, score
+
+
+def generate(count, rng, difficulty=None, box=3):
+    """Yields count puzzles as (puzzle, solution, difficulty, score) tuples,
+    skipping any that are not of the given difficulty (if one is given)"""
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise ValueError("Unknown difficulty '{}', expected one of {}".format(difficulty, ', '.join(DIFFICULTIES)))
+    rater = Sudoku_engine(techniques=DEFAULT_TECHNIQUES, box=box)
+    made = 0
+    while made < count:
+        grid = random_grid(rng, box)
+        puzzle = remove_clues(grid, rng, box)
+        rating, score = rate_puzzle(puzzle, box, rater)
+        if difficulty is None or rating == difficulty:
+            made += 1
+            yield puzzle, grid, rating, score
+
+
+def _generate_chunk(count, seed, difficulty=None, box=3):
+    """Generates a chunk of puzzles in a worker process"""
+    return list(generate(count, random.Random(seed), difficulty, box))
+
+
+def generate_puzzles(count, seed=None, difficulty=None, box=3, workers=1, chunk_size=16):
+    """Yields count puzzles as generate does, spread across worker processes
+    in chunks of chunk_size. Each chunk gets its own seed drawn from seed, so
+    the same seed gives the same puzzles in the same order whatever the
+    number of workers (one per CPU when workers is None). Only a few chunks
+    per worker are queued at a time."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    seeds = random.Random(seed)
+    chunks = [min(chunk_size, count - start) for start in range(0, count, chunk_size)]
+    if workers == 1:
+        for size in chunks:
+            yield from generate(size, random.Random(seeds.getrandbits(64)), difficulty, box)
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for size in chunks:
+            pending.append(executor.submit(_generate_chunk, size, seeds.getrandbits(64), difficulty, box))
+            while len(pending) >= CHUNKS_PER_WORKER * workers:
+                yield from _collect(pending, True)
+        while pending:
+            yield from _collect(pending, True)
+
+
+def main():
+    """Writes generated puzzles to stdout, one per line with their difficulty
+    and score, tab separated"""
+    parser = argparse.ArgumentParser(description='Generates sudoku puzzles with exactly one solution.')
+    parser.add_argument('count', type=int, help='number of puzzles to generate')
+    parser.add_argument('--difficulty', choices=DIFFICULTIES, help='only keep puzzles of this difficulty')
+    parser.add_argument('--seed', type=int, help='seed for reproducible puzzles (default: random)')
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (0 for one per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=16, help='number of puzzles generated by a worker at a time')
+    parser.add_argument('--box', type=int, choices=BOX_SIZES, default=3, help='size of the blocks, which sets the board size')
+    parser.add_argument('--solutions', action='store_true', help='add the solution of each puzzle after it')
+    args = parser.parse_args()
+
+    puzzles = generate_puzzles(args.count, args.seed, args.difficulty, args.box, args.workers or None, args.chunk_size)
+    columns = (0, 1, 2, 3) if args.solutions else (0, 2, 3)
+    write_lines(('\t'.join(str(puzzle[column]) for column in columns) + '\n' for puzzle in puzzles), sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
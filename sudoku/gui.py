@@ -0,0 +1,391 @@
+""" The sudoku assistant GUI. Only imported when the GUI is opened, so the
+    engine can be used where tkinter is missing.
+"""
+
+from tkinter import *
+from tkinter.ttk import *
+import threading
+import time
+
+from .engine import Sudoku_engine, parse_board
+
+POLL_INTERVAL = 100 #milliseconds between progress updates while solving
+REPLAY_FPS = 20 #default speed of the watch the solve replay, in search events shown per second
+
+
+class Gui:
+    """Builds the sudoku assistant gui in a given window/frame"""
+    
+    def __init__(self, window, box=3):
+        """Initializes the variables for; the board, board import/export, board
+        status, and suggestion preferences. Sets a title and frame for each 
+        component then calls relevant Sudoku_engine functions to produce content
+        for each frame. box sets the size of the board, as for Sudoku_engine."""
+        self.window = window
+        self.sudoku = Sudoku_engine(box=box)
+        self.import_var = StringVar()
+        self.export_var = StringVar()
+        self.status_var = StringVar()
+        self.status_var.set("In Progress")
+        self.suggestions_flag = IntVar()
+        self.suggestions_flag.set(1)
+        self.advanced_flag = IntVar()
+        self.advanced_flag.set(0)
+        self.budget_var = StringVar() #seconds the solver may search for, blank for no limit
+        self.watch_flag = IntVar()
+        self.watch_flag.set(0)
+        self.fps_var = StringVar()
+        self.fps_var.set(str(REPLAY_FPS))
+        self.full_width = 1     
+        self.solver_thread = None #runs the engine's solve while the window stays responsive
+        self.solve_started = 0
+        self.cancel_requested = False
+        self.given_board = ''
+        self.replayer = None #the engine stepping through the search while it is watched
+        self.replay_frames = None
+        self.replay_job = None
+        self.replay_interval = 1000 // REPLAY_FPS
+        
+        import_frame = Frame(window)
+        import_frame.grid(row=12, column=0, columnspan=self.full_width)
+        self.import_components(import_frame)
+
+        self.board_frame = Frame(self.window)
+        self.board_frame.grid(row=0, column=0, columnspan=self.full_width)
+        
+        #self.placeholder_frame()
+        self.squares = self.initial_board(self.board_frame)
+
+        export_frame = Frame(window)
+        export_frame.grid(row=13, column=0, columnspan=self.full_width)
+        self.export_components(export_frame)
+        
+        options_frame = Frame(window, height=50)
+        options_frame.grid(row=14, column=0, columnspan=self.full_width, sticky=W+E)
+        self.options(options_frame)
+
+      
+    def advanced(self, *args):
+        if not(self.advanced_flag.get()):
+            self.advanced_flag.set(1)
+            self.advanced_frame = Frame(self.window, height=60)
+            self.advanced_frame.grid(row=15, column=0, columnspan=self.full_width, sticky=W+E)
+            suggestions_toggle = Checkbutton(self.advanced_frame, text='Iteration Suggestions', variable=self.suggestions_flag)
+            suggestions_toggle.place(relx=0.3, rely=0.25, anchor='c')
+            watch_toggle = Checkbutton(self.advanced_frame, text='Watch the Solve', variable=self.watch_flag)
+            watch_toggle.place(relx=0.75, rely=0.25, anchor='c')
+            budget_label = Label(self.advanced_frame, text='Time Budget (s)')
+            budget_label.place(relx=0.2, rely=0.75, anchor='c')
+            budget_field = Entry(self.advanced_frame, textvariable=self.budget_var, width=6)
+            budget_field.place(relx=0.4, rely=0.75, anchor='c')
+            fps_label = Label(self.advanced_frame, text='Steps per Second')
+            fps_label.place(relx=0.65, rely=0.75, anchor='c')
+            fps_field = Entry(self.advanced_frame, textvariable=self.fps_var, width=6)
+            fps_field.place(relx=0.86, rely=0.75, anchor='c')
+            self.status_var.set("Advanced Options Displayed")
+            self.window.update()            
+            
+        else:
+            self.advanced_flag.set(0)
+            self.advanced_frame.destroy()
+            self.status_var.set("Advanced Options Hidden")
+            self.window.update()            
+        
+    
+    def import_components(self, import_frame):
+        """Produces an entry box and a button for importing sudoku boards"""
+        import_field = Entry(import_frame, textvariable=self.import_var, width=35)
+        import_field.grid(row=1, column=1, columnspan=8, sticky=W+E)
+        
+        import_button = Button(import_frame, text='Import', command=self.import_board)
+        import_button.grid(row=1, column=9)
+    
+    
+    def import_board(self, *others):
+        """Checks import string once import is pressed, then updates the
+        sudoku board if the input is valid"""
+        if self.solving():
+            return
+        imported_board = parse_board(self.import_var.get(), self.sudoku.geometry.box)
+        self.sudoku.current_board = imported_board
+        self.display_solution(imported_board)
+        self.status_var.set("Board Imported")
+        self.window.update()        
+    
+        
+    def initial_board(self, frame):
+        """Decides on appropriate placement and padding for the text boxes (81
+        on a 9x9 board) and passes this information to the square function.
+        Also records that every square is shown empty"""
+        box, size = self.sudoku.geometry.box, self.sudoku.geometry.size
+        
+        for column in range(1, size + 1):
+            column_label = Label(frame, text=str(column))
+            column_label.grid(row=0, column=column)
+        
+        for row in range(1, size + 1):
+            row_label = Label(frame, text=str(row))
+            row_label.grid(row=row, column=0)          
+        
+        squares = []
+        for entry in range(self.sudoku.geometry.squares):
+            current_row = entry // size + 1
+            current_column = entry % size + 1
+            pad_x = (0, 5) if entry % size % box == box - 1 else (0,0)
+            pad_y = (0, 5) if entry // size % box == box - 1 else (0,0)
+            square = self.square(frame, entry)#, current_row, current_column, pad_x, pad_y)
+            square.grid(row=current_row, column=current_column, padx=pad_x, pady=pad_y)
+            squares.append(square)
+        self.shown_texts = [''] * len(squares) #the text in each square, so only changed squares are redrawn
+        self.shown_states = [('0', 0)] * len(squares) #the board character and shown candidates it was drawn from
+        return squares
+            
+        
+    def export_components(self, export_frame):
+        """Produces an entry box and a button for exporting sudoku boards"""
+        export_field = Entry(export_frame, textvariable=self.export_var, width=35)
+        export_field.grid(row=13, column=0, columnspan=8, sticky=W+E)
+        export_button = Button(export_frame, text='Export', command=self.export_board)
+        export_button.grid(row=13, column=9)
+
+
+    def export_board(self, *others):
+        """Produces a string that represents the board in its current state
+        and places it in the export entry box (for saving a board in its current
+        state)"""
+        if self.solving():
+            return
+        exported_board = ''# get from engine
+        for character in self.sudoku.current_board:
+            if character == '_':
+                exported_board += '0'
+            else:
+                exported_board += character
+        self.export_var.set(exported_board)
+        self.status_var.set("Board Exported")
+        self.window.update()        
+    
+    
+    def options(self, options_frame):
+        """Places the Iterate, Check, and Solve buttons in the given window/
+        frame"""
+        row_centers = [0.1,0.25,0.75,0.85]
+        iterate_button = Button(options_frame, text='Iterate', command=self.iterate)
+        iterate_button.place(relx=0.2, rely=row_centers[1], anchor='c')
+        check_button = Button(options_frame, text='Check', command=self.check_complete)
+        check_button.place(relx=0.4, rely=row_centers[1], anchor='c')
+        self.solve_button = Button(options_frame, text='Solve', command=self.solve)
+        self.solve_button.place(relx=0.6, rely=row_centers[1], anchor='c')
+        self.cancel_button = Button(options_frame, text='Cancel', command=self.cancel) #takes the Solve button's place while solving
+        self.cancel_place = {'relx': 0.6, 'rely': row_centers[1], 'anchor': 'c'}
+        status_label = Label(options_frame, textvariable=self.status_var)
+        status_label.place(relx=0.5, rely=row_centers[2], anchor='c')        
+        advanced_button = Button(options_frame, text='Advanced', command=self.advanced)
+        advanced_button.place(relx=0.8, rely=row_centers[1], anchor='c')         
+        
+
+    def square(self, window, entry):
+        """Places a text box in the input position with the input padding, with
+        a binding to update the board string whenever a key is released with the
+        text box active"""
+        box = self.sudoku.geometry.box
+        current_entry = Text(window, width=box + 2, height=box) #room for every candidate
+        current_entry.bind('<KeyRelease>', lambda event: self.update(entry, current_entry.get('1.0', 'end-1c')))
+        current_entry.bind('<Tab>', self.change_focus)
+        return current_entry
+    
+    
+    def change_focus(self, event):
+        """Moves the cursor to the next sudoku square"""
+        event.widget.tk_focusNext().focus()
+        return("break")
+    
+    
+    def display_solution(self, solution, sudoku=None):
+        """Divides the information held in the board string into the text
+        boxes, and imports the suggestions (from the given engine, by default
+        the GUI's own) when the character has any. Only the squares whose
+        digit or candidates changed since they were drawn are touched, and
+        Tk redraws them all together afterwards"""
+        sudoku = sudoku or self.sudoku
+        symbols, mask_digits = sudoku.geometry.symbols, sudoku.geometry.mask_digits
+        show_suggestions = self.suggestions_flag.get()
+        shown_texts, shown_states = self.shown_texts, self.shown_states
+        
+        for entry, digit in enumerate(solution):
+            state = (digit, sudoku.candidate_mask(entry) if digit == '_' and show_suggestions else 0)
+            if state == shown_states[entry]:
+                continue
+            shown_states[entry] = state
+            if state[1]:
+                digit = ''.join([symbols[number] for number in mask_digits(state[1])])
+            elif digit == '0' or digit == '_':
+                digit = ''
+                
+            if digit != shown_texts[entry]:
+                shown_texts[entry] = digit
+                self.squares[entry].delete('1.0', 'end-1c')
+                self.squares[entry].insert('end', digit)
+        
+        self.window.update_idletasks()
+
+    
+    def update(self, entry_box, entry_value):
+        """Updates the sudoku board string with the new character, or a
+        placeholder ('0') if input is invalid"""
+        self.shown_texts[entry_box] = entry_value #what was typed is on screen, whatever the engine makes of it
+        self.shown_states[entry_box] = None
+        if self.solving(): #the board is put back once the solve finishes
+            return
+        self.sudoku.update(entry_box, entry_value)
+        self.status_var.set("In Progress")
+        
+        
+    def iterate(self, *args):
+        """Calls the sudoku engine's iterate method, which applies the next
+        technique that makes progress when there are no single options left"""
+        if self.solving():
+            return
+        self.sudoku.iterate(self.suggestions_flag.get())
+        self.display_solution(self.sudoku.current_board)
+        if self.sudoku.check_ok():
+            message = "In Progress"
+            if self.sudoku.last_technique is not None:
+                message = "Applied {}".format(self.sudoku.last_technique.replace('_', ' ').capitalize())
+        else:
+            message = "Invalid Board"
+        self.status_var.set(message)
+        
+    
+    def solving(self):
+        """Returns True while the engine is solving in the background, or the
+        solve is being watched, when nothing else may touch the board"""
+        return self.solver_thread is not None or self.replay_frames is not None
+
+
+    def solve(self, *args):
+        """Starts the sudoku engine's solve method in a background thread, with
+        the time budget from the advanced options, and swaps the Solve button
+        for a Cancel button until it finishes. If the solve is to be watched,
+        the engine keeps a trace of the search for replaying afterwards, so
+        the search itself runs at full speed"""
+        if self.solving():
+            return
+        budget = self.budget_var.get().strip()
+        try:
+            self.sudoku.time_budget = float(budget) if budget else None
+        except ValueError:
+            self.status_var.set("Invalid Time Budget")
+            return
+        if self.sudoku.time_budget is not None and self.sudoku.time_budget <= 0:
+            self.status_var.set("Invalid Time Budget")
+            return
+        if self.watch_flag.get():
+            try:
+                self.replay_interval = max(1, int(1000 / float(self.fps_var.get())))
+            except (ValueError, ZeroDivisionError):
+                self.status_var.set("Invalid Steps per Second")
+                return
+
+        self.sudoku.trace = bool(self.watch_flag.get())
+        self.given_board = self.sudoku.current_board
+        self.status_var.set("Attempting to Solve the Given Puzzle...")
+        self.cancel_requested = False
+        self.solve_started = time.perf_counter()
+        self.solver_thread = threading.Thread(target=self.sudoku.solve, daemon=True)
+        self.solver_thread.start()
+        self.solve_button.place_forget()
+        self.cancel_button.place(**self.cancel_place)
+        self.window.after(POLL_INTERVAL, self.poll_solve)
+
+
+    def cancel(self, *args):
+        """Asks the background solve to stop, or skips to the end of the
+        replay if the solve is being watched"""
+        if self.replay_frames is not None:
+            self.window.after_cancel(self.replay_job)
+            self.finish_solve()
+        elif self.solving():
+            self.cancel_requested = True
+            self.sudoku.cancel()
+            self.status_var.set("Cancelling...")
+
+
+    def poll_solve(self):
+        """Shows the progress of the background solve, checking again after
+        POLL_INTERVAL until it finishes, then shows its outcome"""
+        if self.solver_thread.is_alive():
+            if self.cancel_requested: #again, in case the solve had not started when Cancel was pressed
+                self.sudoku.cancel()
+            else:
+                stats = self.sudoku.stats
+                self.status_var.set("Solving... {} nodes, depth {}, {:.1f} seconds".format(
+                    stats.nodes, stats.max_depth, time.perf_counter() - self.solve_started))
+            self.window.after(POLL_INTERVAL, self.poll_solve)
+            return
+
+        self.solver_thread = None
+        if self.sudoku.trace and self.sudoku.status_var != 'Search Cancelled' and self.sudoku.stats.trace:
+            self.replayer = Sudoku_engine(techniques=self.sudoku.techniques, box=self.sudoku.geometry.box)
+            self.replayer.current_board = self.given_board
+            self.replay_frames = self.replayer.replay(self.sudoku.stats.trace)
+            self.replay_step()
+        else:
+            self.finish_solve()
+
+
+    def replay_step(self):
+        """Shows the board after the next event of the watched search, then
+        waits for the next frame, until the search has been replayed"""
+        frame = next(self.replay_frames, None)
+        if frame is None:
+            self.finish_solve()
+            return
+        event, board = frame
+        size = self.sudoku.geometry.size
+        if event[0] == 'contradiction':
+            message = "Contradiction at depth {}".format(event[1])
+        else:
+            index, digit, depth = event[1:]
+            message = "{} {} at row {}, column {} (depth {})".format('Trying' if event[0] == 'guess' else 'Undoing',
+                                                                     self.sudoku.geometry.symbols[digit],
+                                                                     index // size + 1, index % size + 1, depth)
+        self.display_solution(board, self.replayer)
+        self.status_var.set(message)
+        self.replay_job = self.window.after(self.replay_interval, self.replay_step)
+
+
+    def finish_solve(self):
+        """Puts the Solve button back and shows the outcome of the solve"""
+        self.replay_frames = None
+        self.replayer = None
+        self.cancel_button.place_forget()
+        self.solve_button.place(**self.cancel_place)
+        if self.sudoku.status_var == 'Completed Board':
+            self.status_var.set("Board Completed in {:.3f} seconds ({} guesses)".format(self.sudoku.time_taken,
+                                                                                         self.sudoku.stats.guesses))
+        elif self.sudoku.status_var in ('Search Cancelled', 'Time Budget Exceeded'):
+            self.status_var.set("{} after {:.3f} seconds ({} guesses)".format(self.sudoku.status_var, self.sudoku.time_taken,
+                                                                               self.sudoku.stats.guesses))
+        else:
+            self.status_var.set(self.sudoku.status_var)
+        self.display_solution(self.sudoku.current_board)
+
+        
+    def check_complete(self, *args):
+        """Calls the sudoku engine's check_complete method"""
+        if self.solving():
+            return
+        if self.sudoku.check_ok():
+            self.sudoku.check_complete()
+        self.status_var.set(self.sudoku.status_var)
+
+
+def run_gui(box=3):
+    """Opens the sudoku assistant window (for boards of the given box size)
+    and waits for it to close"""
+    window = Tk()
+    window.title("Sudoku Assistant")
+    window.resizable(width=False, height=False)
+    Gui(window, box)
+    window.mainloop()
@@ -0,0 +1,177 @@
+""" Solves a single board across worker processes, for the rare puzzle that
+    takes long enough that solving a batch in parallel does not help. The
+    board is either split into boards that between them hold every solution
+    (see Sudoku_engine.split), each searched by its own worker, or given
+    whole to a portfolio of differently configured engines racing each
+    other. The first worker with an answer stops the rest.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import multiprocessing
+import os
+import threading
+import time
+
+from .engine import DEFAULT_TECHNIQUES, TECHNIQUES, RESULT_STATUSES, Solve_result, Solve_stats, Sudoku_engine, parse_board
+
+SPLITS_PER_WORKER = 4 #boards each board is split into per worker, so that the work evens out
+STOP_POLL = 0.005 #seconds between a worker's attempts to stop its engine once asked to
+PORTFOLIO = ({'backend': 'propagation', 'techniques': DEFAULT_TECHNIQUES},
+             {'backend': 'dlx', 'techniques': ()},
+             {'backend': 'propagation', 'techniques': TECHNIQUES},
+             {'backend': 'propagation', 'techniques': ()}) #engine options raced by default, best on most boards first
+COUNTED = ('nodes', 'guesses', 'backtracks', 'contradictions', 'propagations', 'propagation_time', 'search_time')
+
+_stop_event = None #set by the main process once the board is answered
+_solving = None #the engine this worker process is running, if any
+
+
+def _start_worker(stop_event):
+    """Keeps the stop event in each worker process and starts the thread that
+    cancels the worker's engine when it is set"""
+    global _stop_event
+    _stop_event = stop_event
+    threading.Thread(target=_watch_stop, daemon=True).start()
+
+
+def _watch_stop():
+    """Cancels the running engine whenever the stop event is set, repeatedly,
+    in case the engine had not yet started its search"""
+    while True:
+        _stop_event.wait()
+        engine = _solving
+        if engine is not None:
+            engine.cancel()
+        time.sleep(STOP_POLL)
+
+
+def _solve_part(board, engine_options):
+    """Solves a board in a worker process, returning its status, solution
+    (or None), and Solve_stats. Boards handed out after the stop event was
+    set are not searched"""
+    global _solving
+    if _stop_event.is_set():
+        return 'cancelled', None, Solve_stats()
+    sudoku = Sudoku_engine(**engine_options)
+    sudoku.current_board = board
+    _solving = sudoku
+    try:
+        stats = sudoku.solve()
+    finally:
+        _solving = None
+    status = RESULT_STATUSES[sudoku.status_var]
+    return status, sudoku.current_board if status == 'solved' else None, stats
+
+
+class Parallel_solver:
+    """Solves one board at a time across a pool of worker processes (one per
+    CPU when workers is None), kept for every board given to solve.
+    Without a portfolio, each board is split into splits boards (by default
+    SPLITS_PER_WORKER per worker), which are searched with the engine
+    options given and handed out in the order a single search would visit
+    them. With a portfolio (a list of dictionaries of Sudoku_engine options,
+    or True for PORTFOLIO), each worker solves the whole board with one of
+    them, so only as many workers as there are options are useful. Either
+    way, the first solution (or, from a portfolio, the first proof that
+    there is none) cancels the other workers, and so does time_budget
+    running out."""
+    def __init__(self, workers=None, splits=None, portfolio=None, backend='propagation', techniques=DEFAULT_TECHNIQUES,
+                 box=3, time_budget=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.splits = splits or SPLITS_PER_WORKER * self.workers
+        self.portfolio = [dict(options) for options in (PORTFOLIO if portfolio is True else portfolio or ())]
+        self.box = box
+        self.time_budget = time_budget
+        self.engine_options = {'backend': backend, 'techniques': techniques, 'box': box}
+        for options in self.portfolio:
+            options['box'] = box
+            Sudoku_engine(**options) #fails here on unknown options rather than in a worker
+        self._splitter = Sudoku_engine(**self.engine_options)
+        self._stop_event = multiprocessing.Event()
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_start_worker, initargs=(self._stop_event,))
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *others):
+        self.close()
+
+
+    def close(self):
+        """Stops any work left and shuts the worker processes down"""
+        self._stop_event.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+    def _parts(self, board):
+        """Returns the (board, engine options) pairs to hand to the workers"""
+        if self.portfolio:
+            return [(board, options) for options in self.portfolio]
+        self._splitter.current_board = board
+        return [(part, self.engine_options) for part in self._splitter.split(self.splits)]
+
+
+    def solve(self, board):
+        """Solves a board string in the import format, returning a
+        Solve_result whose status is 'solved', 'unsolvable', 'invalid', or
+        'timeout'. The counts in its stats are added up over every worker"""
+        start = time.perf_counter()
+        board = parse_board(board, self.box)
+        stats = Solve_stats()
+        self._splitter.current_board = board
+        if not self._splitter.check_ok():
+            stats.time_taken = time.perf_counter() - start
+            return Solve_result(board, None, 'invalid', stats)
+
+        pending = {self._executor.submit(_solve_part, part, options) for part, options in self._parts(board)}
+        status, solution = 'unsolvable', None
+        answered = False
+        while pending and not answered:
+            timeout = None
+            if self.time_budget is not None:
+                timeout = max(0, start + self.time_budget - time.perf_counter())
+            done, pending = wait(pending, timeout, FIRST_COMPLETED)
+            if not done:
+                status = 'timeout'
+                break
+            for future in done:
+                part_status, part_solution, part_stats = future.result()
+                self._add_stats(stats, part_stats)
+                if answered:
+                    continue
+                if part_status == 'solved':
+                    status, solution, answered = 'solved', part_solution, True
+                elif part_status in ('unsolvable', 'invalid') and self.portfolio:
+                    answered = True #every option searches the whole board, so one proof is enough
+
+        if pending: #stop the other workers, and wait so that the next board starts afresh
+            self._stop_event.set()
+            for future in pending:
+                future.cancel()
+            for future in wait(pending)[0]:
+                if not future.cancelled():
+                    self._add_stats(stats, future.result()[2])
+            self._stop_event.clear()
+        stats.time_taken = time.perf_counter() - start
+        return Solve_result(board, solution, status, stats)
+
+
+    def _add_stats(self, stats, part_stats):
+        """Adds the counts of a worker's Solve_stats to the board's stats"""
+        for field in COUNTED:
+            setattr(stats, field, getattr(stats, field) + getattr(part_stats, field))
+        stats.max_depth = max(stats.max_depth, part_stats.max_depth)
+        for name, count in part_stats.technique_counts.items():
+            stats.technique_counts[name] = stats.technique_counts.get(name, 0) + count
+
+
+def solve_parallel(board, workers=None, splits=None, portfolio=None, backend='propagation', techniques=DEFAULT_TECHNIQUES,
+                   box=3, time_budget=None):
+    """Solves a single board string with a Parallel_solver made for it (see
+    Parallel_solver for the options), returning a Solve_result. Starting the
+    worker processes takes some time, so use a Parallel_solver directly for
+    more than one board"""
+    with Parallel_solver(workers, splits, portfolio, backend, techniques, box, time_budget) as solver:
+        return solver.solve(board)
@@ -0,0 +1,251 @@
+""" A long lived solver service, so that callers do not pay for starting a
+    process per puzzle. Clients connect over a Unix socket or localhost TCP
+    and send one JSON object per line, getting one JSON line back for each,
+    in the order they were sent:
+        {"id": 1, "board": "..."}         -> {"id": 1, "board": ..., "solution": ..., "status": ..., "stats": {...}}
+        {"id": 2, "boards": ["...", ...]} -> {"id": 2, "results": [{"board": ..., ...}, ...]}
+        {"id": 3, "command": "health"}    -> {"id": 3, "status": "ok", "metrics": {...}}
+    The id is optional and only echoed back. A request that cannot be read
+    gets {"id": ..., "error": "..."}. Boards from every connection share one
+    queue, and each time a worker process is free it takes every queued
+    board (up to max_batch) as one batch, so batches grow with the load
+    without holding any board back. When the queue is full, connections stop
+    being read until there is room.
+    Usage:
+        python3 -m sudoku.server (--socket PATH | --port N) [--workers N] [--backend NAME] ...
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from .batch import solve_puzzles
+from .cli import add_engine_arguments, engine_options_from_args
+from .engine import parse_board
+
+MAX_BATCH = 64 #boards sent to a worker at once
+MAX_QUEUE = 4096 #boards waiting for a worker before connections stop being read
+MAX_PENDING = 256 #requests of one connection being answered before it stops being read
+MAX_LINE = 16 * 1024 * 1024 #longest request line, in bytes
+
+
+def _solve_boards(boards, engine_options, cache_options):
+    """Solves a batch of boards in a worker process, returning the results of
+    solve_puzzles"""
+    return list(solve_puzzles(boards, engine_options, cache_options))
+
+
+class Solver_service:
+    """Answers requests from any number of connections with a pool of worker
+    processes (one per CPU when workers is None), each solving with
+    Sudoku_engine options from engine_options and, if cache_options is
+    given, through a Solution_cache of its own (see solve_puzzles).
+    metrics() gives the counts reported by the health command."""
+    def __init__(self, workers=None, engine_options=None, cache_options=None, max_batch=MAX_BATCH, max_queue=MAX_QUEUE):
+        self.workers = workers or os.cpu_count() or 1
+        self.engine_options = dict(engine_options or {})
+        self.cache_options = cache_options
+        self.box = self.engine_options.get('box', 3)
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.started = time.time()
+        self.connections = 0 #open now
+        self.requests = 0
+        self.errors = 0
+        self.boards = 0 #solved
+        self.batches = 0
+        self.in_flight = 0 #batches being solved
+        self.solve_time = 0.0 #seconds from queueing each board to its result, added up
+        self.statuses = {}
+        self._executor = None
+        self._queue = None
+        self._slots = None
+
+
+    def metrics(self):
+        """Returns the service's counts as a dictionary"""
+        return {'uptime': time.time() - self.started, 'workers': self.workers, 'connections': self.connections,
+                'requests': self.requests, 'errors': self.errors, 'boards': self.boards, 'batches': self.batches,
+                'mean_batch_size': self.boards / self.batches if self.batches else 0.0,
+                'mean_latency_ms': 1000 * self.solve_time / self.boards if self.boards else 0.0,
+                'queued': self._queue.qsize() if self._queue is not None else 0, 'in_flight': self.in_flight,
+                'statuses': dict(self.statuses)}
+
+
+    async def serve(self, path=None, host='127.0.0.1', port=None, ready=None):
+        """Listens on the Unix socket at path, or else on host and port, until
+        cancelled. ready, if given, is called once connections are accepted"""
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._executor = ProcessPoolExecutor(self.workers)
+        try:
+            await asyncio.gather(*[loop.run_in_executor(self._executor, _solve_boards, [], self.engine_options,
+                                                        self.cache_options) for worker in range(self.workers)]) #start the workers before taking requests
+            if path is not None:
+                server = await asyncio.start_unix_server(self._handle, path, limit=MAX_LINE)
+            else:
+                server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE)
+            batcher = loop.create_task(self._batch_loop())
+            try:
+                async with server:
+                    if ready is not None:
+                        ready(server)
+                    await server.serve_forever()
+            finally:
+                batcher.cancel()
+                if path is not None and os.path.exists(path):
+                    os.unlink(path)
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+
+    async def _batch_loop(self):
+        """Waits for a free worker, then sends it every queued board (up to
+        max_batch) as one batch, forever"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            items = [await self._queue.get()]
+            while len(items) < self.max_batch and not self._queue.empty():
+                items.append(self._queue.get_nowait())
+            loop.create_task(self._run_batch(items))
+
+
+    async def _run_batch(self, items):
+        """Solves a batch of (board, future, queued time) items in a worker,
+        passing each result to its future"""
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            results = await loop.run_in_executor(self._executor, _solve_boards, [board for board, future, queued in items],
+                                                 self.engine_options, self.cache_options)
+        except Exception as error: #such as a worker process dying
+            for board, future, queued in items:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+        self.batches += 1
+        finished = time.perf_counter()
+        for (board, future, queued), result in zip(items, results):
+            self.boards += 1
+            self.solve_time += finished - queued
+            self.statuses[result[2]] = self.statuses.get(result[2], 0) + 1
+            if not future.done():
+                future.set_result(result)
+
+
+    async def _solve(self, board):
+        """Queues a board string and returns its result as a dictionary"""
+        if not isinstance(board, str):
+            raise ValueError('boards must be strings')
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((parse_board(board, self.box), future, time.perf_counter()))
+        given, result, status, time_taken, stats = await future
+        return {'board': given, 'solution': result if status == 'solved' else None, 'status': status, 'stats': stats}
+
+
+    async def _answer(self, line):
+        """Returns the response to a request line as a dictionary"""
+        self.requests += 1
+        response = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('requests must be JSON objects')
+            if 'id' in request:
+                response['id'] = request['id']
+            if request.get('command') == 'health':
+                response.update({'status': 'ok', 'metrics': self.metrics()})
+            elif 'board' in request:
+                response.update(await self._solve(request['board']))
+            elif isinstance(request.get('boards'), list):
+                response['results'] = await asyncio.gather(*[self._solve(board) for board in request['boards']])
+            else:
+                raise ValueError("expected 'board', a list of 'boards', or the 'health' command")
+        except Exception as error: #bad JSON, a bad request, or a worker process that died
+            self.errors += 1
+            response['error'] = str(error) or type(error).__name__
+        return response
+
+
+    async def _handle(self, reader, writer):
+        """Reads the requests of one connection, answering them concurrently
+        while a single writer sends the responses back in order"""
+        self.connections += 1
+        responses = asyncio.Queue(MAX_PENDING)
+        sender = asyncio.get_running_loop().create_task(self._send(responses, writer))
+        try:
+            while not sender.done():
+                try:
+                    line = await reader.readline()
+                except ValueError: #longer than MAX_LINE, after which the stream cannot be followed
+                    self.errors += 1
+                    answer = asyncio.get_running_loop().create_future()
+                    answer.set_result({'error': 'request line too long'})
+                    await responses.put(answer)
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await responses.put(asyncio.ensure_future(self._answer(line)))
+        finally:
+            if not sender.done():
+                await responses.put(None)
+                await sender
+            writer.close()
+            self.connections -= 1
+
+
+    async def _send(self, responses, writer):
+        """Writes each response of a connection as it is ready, in the order
+        the requests came, waiting for a slow reader to catch up"""
+        try:
+            while True:
+                answer = await responses.get()
+                if answer is None:
+                    return
+                writer.write(json.dumps(await answer, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError: #the client has gone
+            while not responses.empty():
+                answer = responses.get_nowait()
+                if answer is not None:
+                    answer.cancel()
+
+
+def main():
+    """Runs the service until interrupted"""
+    parser = argparse.ArgumentParser(description='Serves sudoku solving over a Unix socket or localhost TCP.')
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument('--socket', help='path of the Unix socket to listen on')
+    address.add_argument('--port', type=int, help='TCP port to listen on')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on with --port (default: localhost only)')
+    parser.add_argument('--workers', type=int, default=0, help='number of worker processes (0 for one per CPU)')
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help='most boards sent to a worker at once')
+    parser.add_argument('--max-queue', type=int, default=MAX_QUEUE, help='boards waiting for a worker before reading stops')
+    add_engine_arguments(parser)
+    args = parser.parse_args()
+    engine_options, cache_options = engine_options_from_args(parser, args)
+
+    service = Solver_service(args.workers or None, engine_options, cache_options, args.max_batch, args.max_queue)
+    where = args.socket or '{}:{}'.format(args.host, args.port)
+    try:
+        asyncio.run(service.serve(args.socket, args.host, args.port,
+                                  lambda server: print('Listening on ' + where, file=sys.stderr)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+""" Checks that the canonical forms of sudoku.cache are shared by equivalent
+    boards and that Board_transform maps boards back and forth. Run with
+    python3 -m unittest (or pytest) from the repository root.
+"""
+
+import os
+import random
+import time
+import unittest
+
+from sudoku.cache import Solution_cache, canonical_form
+from sudoku.engine import solve
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'corpora')
+CORPORA = ('easy', 'medium', 'hard', '17_clue', 'hardest')
+TRANSFORMS_PER_BOARD = 3
+
+
+def load_boards(name):
+    """Returns the boards of a bundled corpus"""
+    with open(os.path.join(CORPUS_DIR, name + '.txt')) as corpus_file:
+        return [line.strip() for line in corpus_file if line.strip()]
+
+
+def random_symmetry(board, rng):
+    """Returns the board after a random relabelling of its digits, reordering
+    of the rows within each band, the bands, the columns within each stack,
+    and the stacks, and possibly transposing"""
+    labels = [0] + rng.sample(range(1, 10), 9)
+    bands = rng.sample(range(3), 3)
+    stacks = rng.sample(range(3), 3)
+    rows = [3 * band + row for band in bands for row in rng.sample(range(3), 3)]
+    columns = [3 * stack + column for stack in stacks for column in rng.sample(range(3), 3)]
+    transposed = rng.random() < 0.5
+    cells = []
+    for row in rows:
+        for column in columns:
+            index = 9 * column + row if transposed else 9 * row + column
+            cells.append(str(labels[int(board[index])]))
+    return ''.join(cells)
+
+
+class Canonical_form_test(unittest.TestCase):
+    def test_equivalent_boards_share_a_form(self):
+        rng = random.Random(1)
+        for name in CORPORA:
+            for board in load_boards(name):
+                canonical, transform = canonical_form(board)
+                self.assertIsNotNone(canonical, board)
+                self.assertEqual(transform.apply(board), canonical)
+                for attempt in range(TRANSFORMS_PER_BOARD):
+                    equivalent = random_symmetry(board, rng)
+                    self.assertEqual(canonical_form(equivalent)[0], canonical, (board, equivalent))
+
+
+    def test_revert_undoes_apply(self):
+        for name in CORPORA:
+            for board in load_boards(name):
+                transform = canonical_form(board)[1]
+                self.assertEqual(transform.revert(transform.apply(board)), board)
+                solution = solve(board).solution
+                self.assertEqual(transform.revert(transform.apply(solution)), solution)
+
+
+    def test_symmetric_boards_are_given_up_quickly(self):
+        full = solve('0' * 81).solution
+        diagonal = ''.join(full[index] if index % 10 == 0 else '0' for index in range(81))
+        for board in (full, diagonal, '0' * 81):
+            start = time.perf_counter()
+            self.assertEqual(canonical_form(board), (None, None))
+            self.assertLess(time.perf_counter() - start, 0.05)
+
+
+class Solution_cache_test(unittest.TestCase):
+    def test_equivalent_board_is_a_hit(self):
+        rng = random.Random(2)
+        cache = Solution_cache()
+        for board in load_boards('hard')[:20]:
+            first = cache.solve(board)
+            equivalent = random_symmetry(board, rng)
+            hits = cache.hits
+            result = cache.solve(equivalent)
+            self.assertEqual(cache.hits, hits + 1)
+            self.assertEqual(result.status, first.status)
+            self.assertEqual(result.solution, solve(equivalent).solution)
+
+
+    def test_symmetric_board_is_solved_without_the_cache(self):
+        cache = Solution_cache()
+        for attempt in range(2):
+            result = cache.solve('0' * 81)
+            self.assertEqual(result.status, 'solved')
+        self.assertEqual(cache.cache_info()['skipped'], 2)
+        self.assertEqual(cache.hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+""" Checks that boards of every size come back unchanged from the packed format
+    of sudoku.corpus, read by number or in order. Run with python3 -m unittest
+    (or pytest) from the repository root.
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from sudoku.corpus import Packed_corpus, pack_board, record_size, unpack_board, write_packed
+from sudoku.engine import BOX_SIZES, board_geometry
+
+BOARDS_PER_SIZE = 20
+
+
+def random_boards(box, rng):
+    """Returns an empty board, a board of the highest digit, and random boards
+    with about half their squares empty, as board strings"""
+    geometry = board_geometry(box)
+    symbols = geometry.symbols
+    boards = ['0' * geometry.squares, symbols[-1] * geometry.squares]
+    for number in range(BOARDS_PER_SIZE):
+        boards.append(''.join([rng.choice(symbols[1:]) if rng.random() < 0.5 else '0' for index in range(geometry.squares)]))
+    return boards
+
+
+class Packed_corpus_test(unittest.TestCase):
+    def test_pack_unpack_round_trip(self):
+        rng = random.Random(1)
+        for box in BOX_SIZES:
+            for board in random_boards(box, rng):
+                record = pack_board(board, box)
+                self.assertEqual(len(record), record_size(box))
+                self.assertEqual(unpack_board(record, box), board)
+
+
+    def test_file_round_trip(self):
+        rng = random.Random(2)
+        with tempfile.TemporaryDirectory() as directory:
+            for box in BOX_SIZES:
+                boards = random_boards(box, rng)
+                path = os.path.join(directory, '{}.sdkp'.format(box))
+                with open(path, 'wb') as packed_file:
+                    self.assertEqual(write_packed(boards, packed_file, box), len(boards))
+                with Packed_corpus(path) as corpus:
+                    self.assertEqual(corpus.box, box)
+                    self.assertEqual(len(corpus), len(boards))
+                    self.assertEqual(list(corpus), boards)
+                    for number in range(-len(boards), len(boards)):
+                        self.assertEqual(corpus[number], boards[number])
+                    for number in (len(boards), -len(boards) - 1):
+                        with self.assertRaises(IndexError):
+                            corpus[number]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+""" Checks that the backends of sudoku.engine agree on how many solutions a
+    board has. Run with python3 -m unittest (or pytest) from the repository
+    root.
+"""
+
+import os
+import random
+import unittest
+
+from sudoku.engine import Sudoku_engine, board_geometry
+from sudoku.generate import random_grid
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'corpora')
+BOARDS_PER_SIZE = 100
+LIMIT = 10 #solutions counted before giving up, so boards with few clues stay quick
+
+
+def count_solutions(board, backend, box=3):
+    """Returns the number of solutions the backend finds for a board, up to LIMIT"""
+    sudoku = Sudoku_engine(backend=backend, box=box)
+    sudoku.current_board = board
+    return sudoku.count_solutions(LIMIT)
+
+
+def partial_boards(box, rng):
+    """Returns boards made by emptying between half and most of the squares of
+    random full boards, every third one with a random digit changed so some
+    have no solution"""
+    geometry = board_geometry(box)
+    boards = []
+    for number in range(BOARDS_PER_SIZE):
+        cells = list(random_grid(rng, box))
+        for index in rng.sample(range(geometry.squares), int(geometry.squares * rng.uniform(0.5, 0.8))):
+            cells[index] = '0'
+        if number % 3 == 0:
+            cells[rng.randrange(geometry.squares)] = rng.choice(geometry.symbols[1:])
+        boards.append(''.join(cells))
+    return boards
+
+
+class Backend_agreement_test(unittest.TestCase):
+    def test_count_solutions_agrees(self):
+        rng = random.Random(1)
+        counts = set()
+        for box in (2, 3):
+            for board in partial_boards(box, rng):
+                count = count_solutions(board, 'propagation', box)
+                self.assertEqual(count_solutions(board, 'dlx', box), count, board)
+                counts.add(count)
+        self.assertTrue({0, 1, LIMIT} <= counts, counts) #boards with none, one and many solutions were all met
+
+
+    def test_corpus_boards_are_unique_for_both(self):
+        with open(os.path.join(CORPUS_DIR, 'hard.txt')) as corpus_file:
+            boards = [line.strip() for line in corpus_file if line.strip()]
+        for board in boards[:20]:
+            self.assertEqual(count_solutions(board, 'propagation'), 1, board)
+            self.assertEqual(count_solutions(board, 'dlx'), 1, board)
+
+
+if __name__ == '__main__':
+    unittest.main()